@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Event-loop latency under mixed cache load: blocking sqlite3 calls vs AsyncCache.
+
+Usage: python benchmarks/bench_cache_io.py [--workers 32] [--seconds 3]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cache import AsyncCache, CacheEngine
+
+TTL = 24 * 60 * 60
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_report(size_kb: int) -> str:
+    return json.dumps({"evidence": {"blob": "x" * size_kb * 1024}, "risk_score": 42})
+
+
+async def probe(latencies, stop, interval=0.001):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        latencies.append((loop.time() - expected) * 1000)
+
+
+async def run(mode, engine, workers, seconds, keys, payload, write_ratio):
+    cache = AsyncCache(engine) if mode == "async" else None
+    op_latencies = []
+    loop_latencies = []
+    stop = asyncio.Event()
+    
+    async def worker():
+        rng = random.Random()
+        while not stop.is_set():
+            key = rng.choice(keys)
+            started = time.perf_counter()
+            if rng.random() < write_ratio:
+                values = {"report": payload, "cached_at": time.time()}
+                if cache:
+                    await cache.put("report_cache", key, values)
+                else:
+                    engine.put("report_cache", key, values)
+            else:
+                if cache:
+                    row = await cache.read(_load, engine, key)
+                else:
+                    row = _load(engine, key)
+                    await asyncio.sleep(0)
+            op_latencies.append((time.perf_counter() - started) * 1000)
+    
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    tasks.append(asyncio.create_task(probe(loop_latencies, stop)))
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    if cache:
+        cache.close()
+    
+    return {
+        "ops": len(op_latencies),
+        "ops_per_sec": round(len(op_latencies) / seconds),
+        "op_p50_ms": round(percentile(op_latencies, 50), 2),
+        "op_p99_ms": round(percentile(op_latencies, 99), 2),
+        "loop_p50_ms": round(percentile(loop_latencies, 50), 2),
+        "loop_p99_ms": round(percentile(loop_latencies, 99), 2),
+        "loop_max_ms": round(max(loop_latencies, default=0.0), 2)
+    }
+
+
+def _load(engine, key):
+    row = engine.get_fresh("report_cache", key, ["report"], TTL)
+    return json.loads(row["report"]) if row else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--report-kb", type=int, default=64)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+    
+    payload = make_report(args.report_kb)
+    keys = [f"pkg-{i}" for i in range(args.keys)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = CacheEngine(os.path.join(tmp, "cache.db"))
+        engine.put_many("report_cache", [(key, {"report": payload, "cached_at": time.time()}) for key in keys])
+        
+        print(f"workers={args.workers} report={args.report_kb}KB writes={args.write_ratio:.0%}")
+        for mode in ("blocking", "async"):
+            result = asyncio.run(run(mode, engine, args.workers, args.seconds, keys, payload, args.write_ratio))
+            print(f"{mode:>9}: " + " ".join(f"{k}={v}" for k, v in result.items()))
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Shannon entropy over a file's candidate strings: per-string loop vs batched bincount.
+
+Usage: python benchmarks/bench_entropy.py [--strings 2000] [--repeat 5] [bundle.js ...]
+
+Without arguments random base64/hex/identifier-like candidates are generated;
+pass real bundles to use the strings the entropy detector actually extracts.
+The batched path needs NumPy (optional); results must match bit for bit.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import audit
+from audit import calculate_entropies, calculate_entropy
+from tarball_scanner import HIGH_ENTROPY_PATTERN
+
+ALPHABETS = [
+    string.ascii_letters + string.digits + "+/=",
+    string.hexdigits.lower(),
+    string.ascii_lowercase + "_"
+]
+
+
+def make_candidates(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(rng.choice(ALPHABETS)) for _ in range(rng.randint(50, 2000)))
+        for _ in range(count)
+    ]
+
+
+def load_candidates(paths):
+    candidates = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            candidates.extend(HIGH_ENTROPY_PATTERN.findall(f.read()))
+    return candidates
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--strings", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    candidates = load_candidates(args.paths) if args.paths else make_candidates(args.strings)
+    total = sum(map(len, candidates))
+    print(f"candidates={len(candidates)} chars={total}")
+    
+    loop_time, expected = best_of(lambda: [calculate_entropy(s) for s in candidates], args.repeat)
+    print(f"     loop: {loop_time * 1000:.1f}ms")
+    
+    if audit.np is None:
+        print("  batched: skipped (numpy not installed)")
+        return
+    
+    batch_time, actual = best_of(lambda: calculate_entropies(candidates), args.repeat)
+    mismatches = sum(a != b for a, b in zip(expected, actual))
+    print(f"  batched: {batch_time * 1000:.1f}ms speedup={loop_time / batch_time:.1f}x mismatches={mismatches}")
+    if mismatches or len(expected) != len(actual):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Typosquat vetting of a whole lockfile: per-name calls vs the batch API.
+
+Usage: python benchmarks/bench_lockfile.py [--names 2000] [--corpus-size 10000] [package-lock.json]
+
+Without a lockfile a 2k-name dependency list is generated (mostly unrelated
+names, some popular packages, some typos of them). The per-name baseline is the
+pre-batch audit path: one lookup per name plus list membership for is_popular.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import audit
+from audit import (
+    calculate_typosquat_score,
+    find_confusable_matches,
+    find_typosquat_matches,
+    find_typosquat_matches_many,
+    load_typosquat_corpus
+)
+from bench_typosquat import make_corpus, make_queries
+
+
+def lockfile_names(path):
+    with open(path, encoding="utf-8") as f:
+        lock = json.load(f)
+    paths = lock.get("packages") or lock.get("dependencies") or {}
+    return sorted({key.rsplit("node_modules/", 1)[-1] for key in paths if key})
+
+
+def make_lockfile(corpus, count, seed=3):
+    rng = random.Random(seed)
+    names = rng.sample(corpus, min(len(corpus), count // 5))
+    names += make_queries(corpus, count // 10, seed=seed)
+    names += make_corpus(count, seed=seed + 1000)[:count - len(names)]
+    rng.shuffle(names)
+    return names
+
+
+def per_name(names):
+    results = {}
+    for name in names:
+        min_distance, matches = find_typosquat_matches(name)
+        confusables = find_confusable_matches(name)
+        is_popular = name in audit.POPULAR_PACKAGES
+        results[name] = {
+            "min_distance": min_distance,
+            "matches": matches,
+            "confusables": confusables,
+            "is_popular": is_popular,
+            "score": calculate_typosquat_score(min_distance, is_popular, bool(confusables))
+        }
+    return results
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("lockfile", nargs="?")
+    parser.add_argument("--names", type=int, default=2000)
+    parser.add_argument("--corpus-size", type=int, default=10000,
+                        help="synthetic corpus size; 0 uses src/data/popular_packages.txt")
+    args = parser.parse_args()
+    
+    if args.corpus_size:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("\n".join(make_corpus(args.corpus_size)))
+        load_typosquat_corpus(f.name)
+        os.unlink(f.name)
+    corpus = list(audit.POPULAR_PACKAGES)
+    
+    names = lockfile_names(args.lockfile) if args.lockfile else make_lockfile(corpus, args.names)
+    print(f"corpus={len(corpus)} names={len(names)}")
+    
+    baseline_time, expected = timed(per_name, names)
+    batch_time, actual = timed(find_typosquat_matches_many, names)
+    flagged = sum(1 for result in actual.values() if result["score"])
+    
+    print(f" per-name: {baseline_time * 1000:.0f}ms ({len(names) / baseline_time:.0f} names/s)")
+    print(f"    batch: {batch_time * 1000:.0f}ms ({len(names) / batch_time:.0f} names/s) "
+          f"speedup={baseline_time / batch_time:.1f}x flagged={flagged} identical={actual == expected}")
+    if actual != expected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Per-file detector throughput: one regex pass per detector vs the combined matcher.
+
+Usage: python benchmarks/bench_scanner.py [--size-mb 5] [--repeat 3] [bundle.js | dir ...]
+
+Without arguments a synthetic minified bundle is generated; pass real bundles
+(e.g. node_modules/*/dist/*.min.js) to measure against production code, or a
+directory such as node_modules to time the whole corpus and print how often
+the literal prefilter let each rule skip a file.
+"""
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from audit import calculate_entropy
+from tarball_scanner import (
+    SOURCE_EXTENSIONS,
+    SUSPICIOUS_TOKENS,
+    empty_findings,
+    extract_snippet,
+    get_prefilter_stats,
+    reset_prefilter_stats,
+    scan_file_content
+)
+
+LOCATION_FIELDS = ("offset", "line", "column")
+
+
+def legacy_scan_file_content(content, file_path, findings):
+    for pattern in SUSPICIOUS_TOKENS[:3]:
+        if re.findall(pattern, content, re.IGNORECASE):
+            if "eval" in pattern.lower() or "function" in pattern.lower():
+                findings["has_eval_function"] = True
+                findings["eval_patterns"].append({
+                    "file": file_path, "pattern": pattern, "snippet": extract_snippet(content, pattern)
+                })
+    
+    for pattern in SUSPICIOUS_TOKENS[3:7]:
+        if re.findall(pattern, content, re.IGNORECASE):
+            findings["has_network_commands"] = True
+            findings["network_patterns"].append({
+                "file": file_path, "pattern": pattern, "snippet": extract_snippet(content, pattern)
+            })
+    
+    for s in re.findall(r'["\'][A-Za-z0-9+/=]{100,}["\']', content):
+        entropy = calculate_entropy(s)
+        if entropy > 4.0:
+            findings["has_high_entropy"] = True
+            findings["high_entropy_strings"].append({
+                "file": file_path, "entropy": round(entropy, 2), "length": len(s),
+                "snippet": s[:100] + "..." if len(s) > 100 else s
+            })
+    
+    for h in re.findall(r'\\x[0-9a-fA-F]{2}(?:\\x[0-9a-fA-F]{2}){50,}', content):
+        findings["has_high_entropy"] = True
+        findings["high_entropy_strings"].append({
+            "file": file_path, "type": "hex_encoded", "length": len(h),
+            "snippet": h[:100] + "..." if len(h) > 100 else h
+        })
+
+
+def synthetic_bundle(size_mb: float, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + "+/"
+    statements = [
+        "function a{0}(b,c){{return b+c*{0}}}",
+        "var x{0}=document.getElementById('n{0}');",
+        "if(e&&e.length>{0}){{t.push(e[{0}])}}",
+        "const s{0}=\"{1}\";",
+        "fetch('/api/{0}').then(function(r){{return r.json()}});",
+    ]
+    parts = []
+    total = 0
+    target = int(size_mb * 1024 * 1024)
+    i = 0
+    while total < target:
+        blob = "".join(rng.choice(alphabet) for _ in range(120)) if i % 97 == 0 else "ok"
+        part = rng.choice(statements).format(i, blob)
+        if i % 5003 == 0:
+            part += "eval(atob(p));new Function('x','return x');"
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def strip_locations(findings):
+    return {
+        key: [{k: v for k, v in item.items() if k not in LOCATION_FIELDS} for item in value]
+        if isinstance(value, list) else value
+        for key, value in findings.items()
+    }
+
+
+def timed(scan, contents, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        findings = empty_findings()
+        started = time.perf_counter()
+        for content in contents:
+            scan(content, "bundle.js", findings)
+        best = min(best, time.perf_counter() - started)
+    return best, findings
+
+
+def read_sources(paths):
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = [
+                os.path.join(root, filename)
+                for root, _, filenames in os.walk(path)
+                for filename in filenames if filename.endswith(SOURCE_EXTENSIONS)
+            ]
+        else:
+            files = [path]
+        contents = []
+        for file_path in sorted(files):
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                contents.append(f.read())
+        sources.append((path, contents))
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    if args.files:
+        sources = read_sources(args.files)
+    else:
+        sources = [(f"synthetic-{args.size_mb:g}MB", [synthetic_bundle(args.size_mb)])]
+    
+    for name, contents in sources:
+        legacy, legacy_findings = timed(legacy_scan_file_content, contents, args.repeat)
+        reset_prefilter_stats()
+        combined, combined_findings = timed(scan_file_content, contents, 1)
+        prefilter = get_prefilter_stats()
+        combined = min(combined, timed(scan_file_content, contents, args.repeat)[0])
+        same = strip_locations(combined_findings) == legacy_findings
+        size_mb = sum(len(content) for content in contents) / (1024 * 1024)
+        print(
+            f"{name}: files={len(contents)} {size_mb:.1f}MB legacy={legacy * 1000:.1f}ms "
+            f"combined={combined * 1000:.1f}ms speedup={legacy / combined:.2f}x identical={same}"
+        )
+        print(f"  prefilter: {prefilter['files_skipped']}/{prefilter['files']} files need no token or hex rule")
+        for pattern, counters in prefilter["rules"].items():
+            print(f"  {pattern:<50} hits={counters['hits']} skipped={counters['skipped']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Typosquat lookups: linear Levenshtein scan vs the segment index, at growing corpus sizes.
+
+Usage: python benchmarks/bench_typosquat.py [--sizes 1000 10000 100000] [--queries 200] [names.txt]
+
+Without a names file synthetic package names are generated; pass an export of
+real npm names (one per line, most popular first) to benchmark that corpus.
+Each lookup result is checked against the linear scan on a sample of queries.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from audit import TyposquatIndex, levenshtein_distance, load_popular_packages
+
+SYLLABLES = [
+    "re", "act", "lo", "dash", "ex", "press", "vue", "an", "gu", "lar", "ba", "bel", "type", "script",
+    "es", "lint", "web", "pack", "mo", "ment", "node", "js", "fetch", "http", "util", "core", "cli",
+    "parse", "json", "date", "time", "color", "log", "fs", "path", "stream", "async", "redux", "plugin",
+    "loader", "config", "kit", "ui", "vite", "test", "mock", "server", "query", "form", "icon"
+]
+
+
+def make_name(rng):
+    name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+    if rng.random() < 0.3:
+        name += "-" + rng.choice(SYLLABLES) + rng.choice(SYLLABLES)
+    if rng.random() < 0.1:
+        name = "@" + rng.choice(SYLLABLES) + "/" + name
+    return name
+
+
+def make_corpus(size, seed=11):
+    rng = random.Random(seed)
+    names = {}
+    while len(names) < size:
+        names.setdefault(make_name(rng), None)
+    return list(names)
+
+
+def make_queries(names, count, seed=5):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        chars = list(rng.choice(names))
+        for _ in range(rng.randint(0, 3)):
+            position = rng.randint(0, len(chars))
+            op = rng.randint(0, 2)
+            if op == 0:
+                chars.insert(position, rng.choice("abez-._1"))
+            elif chars and op == 1:
+                chars.pop(min(position, len(chars) - 1))
+            elif chars:
+                chars[min(position, len(chars) - 1)] = rng.choice("aeiou-")
+        queries.append("".join(chars))
+    return queries
+
+
+def linear_lookup(names, name, max_distance=2):
+    hits = []
+    for rank, popular in enumerate(names):
+        if popular == name:
+            continue
+        distance = levenshtein_distance(name.lower(), popular.lower())
+        if distance <= max_distance:
+            hits.append((rank, distance))
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("names", nargs="?")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--linear-budget", type=int, default=200_000,
+                        help="max name comparisons spent on the linear baseline per corpus size")
+    args = parser.parse_args()
+    
+    source = load_popular_packages(args.names) if args.names else make_corpus(max(args.sizes))
+    
+    for size in args.sizes:
+        names = source[:size]
+        queries = make_queries(names, args.queries)
+        
+        started = time.perf_counter()
+        index = TyposquatIndex(names)
+        build_time = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        results = [index.lookup(query) for query in queries]
+        index_time = (time.perf_counter() - started) / len(queries)
+        
+        sample = queries[:max(1, min(len(queries), args.linear_budget // len(names)))]
+        started = time.perf_counter()
+        expected = [linear_lookup(names, query) for query in sample]
+        linear_time = (time.perf_counter() - started) / len(sample)
+        mismatches = sum(a != b for a, b in zip(expected, results))
+        
+        print(
+            f"names={len(names):>6} build={build_time * 1000:.0f}ms "
+            f"linear={linear_time * 1000:.2f}ms/query index={index_time * 1000:.3f}ms/query "
+            f"speedup={linear_time / index_time:.0f}x checked={len(sample)} mismatches={mismatches}"
+        )
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,52 @@
 import math
+import os
+import statistics
+import unicodedata
+from bisect import bisect_left
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 
-POPULAR_PACKAGES = [
-    "react", "vue", "angular", "express", "lodash", "axios", "moment", "jquery",
-    "webpack", "babel", "typescript", "eslint", "prettier", "jest", "mocha",
-    "chai", "redux", "mobx", "next", "nuxt", "gatsby", "svelte", "ember",
-    "backbone", "underscore", "async", "bluebird", "rxjs", "socket.io", "mongoose",
-    "sequelize", "knex", "pg", "mysql", "redis", "mongodb", "graphql", "apollo",
-    "request", "superagent", "cheerio", "puppeteer", "playwright", "cypress",
-    "commander", "yargs", "chalk", "ora", "inquirer", "dotenv", "uuid", "nanoid",
-    "date-fns", "dayjs", "ramda", "immutable", "classnames", "styled-components",
-    "emotion", "tailwindcss", "bootstrap", "material-ui", "antd", "semantic-ui",
-    "formik", "yup", "validator", "bcrypt", "jsonwebtoken", "passport", "helmet",
-    "cors", "body-parser", "multer", "nodemailer", "sharp", "jimp", "canvas",
-    "three", "d3", "chart.js", "highcharts", "leaflet", "mapbox-gl", "cesium"
-]
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+POPULAR_PACKAGES_FILE = os.path.join(os.path.dirname(__file__), "data", "popular_packages.txt")
+TYPOSQUAT_MAX_DISTANCE = 2
+LEVENSHTEIN_BATCH_MIN = 32
+LEVENSHTEIN_BATCH_PAIRS = 8192
+
+HOMOGLYPHS = str.maketrans({
+    "\u0430": "a", "\u0435": "e", "\u043e": "o", "\u0440": "p", "\u0441": "c", "\u0443": "y",
+    "\u0445": "x", "\u0456": "i", "\u0458": "j", "\u0455": "s", "\u0501": "d", "\u04bb": "h",
+    "\u03bf": "o", "\u03b1": "a", "\u03bd": "v", "\u03c1": "p", "\u03b9": "i", "\u03ba": "k",
+    "\u0261": "g", "\u0131": "i", "0": "o", "1": "l", "|": "l"
+})
+HOMOGLYPH_SEQUENCES = [("rn", "m"), ("vv", "w")]
+NAME_SEPARATORS = str.maketrans("", "", "@/-_. ")
+CONFUSABLE_SUFFIXES = ("js", "node")
+
+
+def load_popular_packages(path: str = POPULAR_PACKAGES_FILE) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        names = [line.strip() for line in f]
+    return [name for name in names if name and not name.startswith("#")]
+
+
+POPULAR_PACKAGES = load_popular_packages()
+
+RELEASE_EPOCH = datetime(1970, 1, 1)
+NON_RELEASE_KEYS = ("created", "modified")
+TIMELINE_LENGTH = 20
+DAY_MICROS = 24 * 60 * 60 * 1_000_000
+BURST_WINDOW_MICROS = DAY_MICROS
+BURST_MIN_RELEASES = 5
+
+TARBALL_REJECTION_SCORES = {"integrity_mismatch": 100, "too_large": 50}
+TARBALL_REJECTION_FLAGS = {
+    "integrity_mismatch": "Tarball does not match the registry's published integrity hash",
+    "too_large": "Tarball exceeds the download size limit and was not fully scanned"
+}
 
 FREE_EMAIL_DOMAINS = [
     "gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "aol.com",
@@ -44,6 +75,123 @@ def levenshtein_distance(s1: str, s2: str) -> int:
     return previous_row[-1]
 
 
+def bounded_levenshtein(s1: str, s2: str, max_distance: int) -> int:
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    
+    over = max_distance + 1
+    if len(s1) - len(s2) > max_distance:
+        return over
+    if not s2:
+        return len(s1)
+    
+    previous_row = [min(j, over) for j in range(len(s2) + 1)]
+    current_row = [over] * (len(s2) + 1)
+    for i, c1 in enumerate(s1, 1):
+        first = max(1, i - max_distance)
+        last = min(len(s2), i + max_distance)
+        current_row[first - 1] = min(i, over) if first == 1 else over
+        row_min = current_row[first - 1]
+        for j in range(first, last + 1):
+            value = min(
+                previous_row[j - 1] + (c1 != s2[j - 1]),
+                previous_row[j] + 1,
+                current_row[j - 1] + 1,
+                over
+            )
+            current_row[j] = value
+            if value < row_min:
+                row_min = value
+        if last < len(s2):
+            current_row[last + 1] = over
+        if row_min > max_distance:
+            return over
+        previous_row, current_row = current_row, previous_row
+    
+    return previous_row[len(s2)]
+
+
+def bounded_levenshtein_many(
+    name: str,
+    candidates: List[str],
+    max_distance: int,
+    min_batch: int = LEVENSHTEIN_BATCH_MIN
+) -> List[int]:
+    return bounded_levenshtein_pairs([(name, candidate) for candidate in candidates], max_distance, min_batch)
+
+
+def pad_codes(strings: List[str], fill: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+    width = max(int(lengths.max(initial=0)), 1)
+    padded = "".join(s.ljust(width, "\0") for s in strings)
+    codes = np.frombuffer(padded.encode("utf-32-le"), dtype=np.int32).reshape(len(strings), width).copy()
+    codes[np.arange(width) >= lengths[:, None]] = fill
+    return codes, lengths
+
+
+def bounded_levenshtein_pairs(
+    pairs: List[Tuple[str, str]],
+    max_distance: int,
+    min_batch: int = LEVENSHTEIN_BATCH_MIN
+) -> List[int]:
+    if np is None or len(pairs) < min_batch:
+        return [bounded_levenshtein(s1, s2, max_distance) for s1, s2 in pairs]
+    
+    names, name_lengths = pad_codes([s1 for s1, _ in pairs], -2)
+    codes, code_lengths = pad_codes([s2 for _, s2 in pairs], -1)
+    order = np.arange(len(pairs))
+    return bounded_levenshtein_indexed(names, name_lengths, order, codes, code_lengths, order, max_distance).tolist()
+
+
+def bounded_levenshtein_indexed(
+    names: "np.ndarray",
+    name_lengths: "np.ndarray",
+    name_index: "np.ndarray",
+    codes: "np.ndarray",
+    code_lengths: "np.ndarray",
+    code_index: "np.ndarray",
+    max_distance: int
+) -> "np.ndarray":
+    over = max_distance + 1
+    pair_names = name_lengths[name_index]
+    pair_codes = code_lengths[code_index]
+    distances = np.full(name_index.size, over, dtype=np.int64)
+    eligible = np.flatnonzero(np.abs(pair_names - pair_codes) <= max_distance)
+    
+    empty = eligible[pair_names[eligible] == 0]
+    distances[empty] = pair_codes[empty]
+    eligible = eligible[pair_names[eligible] > 0]
+    eligible = eligible[np.argsort(pair_names[eligible], kind="stable")]
+    
+    for chunk_start in range(0, eligible.size, LEVENSHTEIN_BATCH_PAIRS):
+        chunk = eligible[chunk_start:chunk_start + LEVENSHTEIN_BATCH_PAIRS]
+        chunk_names = pair_names[chunk]
+        chunk_codes = pair_codes[chunk]
+        depth = int(chunk_names.max())
+        width = max(int(chunk_codes.max()), 1)
+        left = names[name_index[chunk], :depth]
+        right = codes[code_index[chunk], :width]
+        
+        columns = np.arange(width + 1, dtype=np.int16)
+        previous = np.broadcast_to(np.minimum(columns, over), (chunk.size, width + 1))
+        for i in range(1, depth + 1):
+            best = np.empty_like(previous)
+            best[:, 0] = min(i, over)
+            np.minimum(previous[:, :-1] + (right != left[:, i - 1:i]), previous[:, 1:] + 1, out=best[:, 1:])
+            current = np.minimum.accumulate(best - columns, axis=1) + columns
+            np.minimum(current, over, out=current)
+            previous = current
+            
+            done = chunk_names == i
+            if done.any():
+                distances[chunk[done]] = current[done, chunk_codes[done]]
+            pending = chunk_names > i
+            if not pending.any() or current[pending].min() > max_distance:
+                break
+    
+    return distances
+
+
 def calculate_entropy(data: str) -> float:
     if not data:
         return 0.0
@@ -62,26 +210,249 @@ def calculate_entropy(data: str) -> float:
     return entropy
 
 
-def find_typosquat_matches(package_name: str) -> Tuple[int, List[Dict[str, Any]]]:
+def calculate_entropies(strings: List[str]) -> List[float]:
+    if np is None:
+        return [calculate_entropy(s) for s in strings]
+    
+    entropies = [0.0] * len(strings)
+    batch = []
+    for index, s in enumerate(strings):
+        if s and max(s) <= "\xff":
+            batch.append(index)
+        elif s:
+            entropies[index] = calculate_entropy(s)
+    if not batch:
+        return entropies
+    
+    texts = [strings[index] for index in batch]
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    codes = np.frombuffer("".join(texts).encode("latin-1"), dtype=np.uint8)
+    keys = np.repeat(np.arange(len(texts), dtype=np.int64) * 256, lengths) + codes
+    
+    counts = np.bincount(keys, minlength=len(texts) * 256).reshape(len(texts), 256)
+    first_seen = np.full(len(texts) * 256, codes.size, dtype=np.int64)
+    np.minimum.at(first_seen, keys, np.arange(codes.size, dtype=np.int64))
+    
+    distinct = int((counts > 0).sum(axis=1).max())
+    order = np.argsort(first_seen.reshape(len(texts), 256), axis=1, kind="stable")[:, :distinct]
+    probabilities = np.take_along_axis(counts, order, axis=1) / lengths[:, None]
+    
+    present = probabilities > 0
+    values, inverse = np.unique(probabilities[present], return_inverse=True)
+    logs = np.zeros_like(probabilities)
+    logs[present] = np.array([math.log2(value) for value in values])[inverse]
+    terms = probabilities * logs
+    
+    result = np.zeros(len(texts))
+    for column in range(distinct):
+        result -= terms[:, column]
+    
+    for index, entropy in zip(batch, result.tolist()):
+        entropies[index] = entropy
+    return entropies
+
+
+def fold_homoglyphs(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c)).translate(HOMOGLYPHS)
+    for sequence, replacement in HOMOGLYPH_SEQUENCES:
+        folded = folded.replace(sequence, replacement)
+    return folded
+
+
+def strip_confusable_suffix(name: str) -> str:
+    for suffix in CONFUSABLE_SUFFIXES:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def canonical_name(name: str) -> str:
+    return fold_homoglyphs(name).translate(NAME_SEPARATORS)
+
+
+def confusable_variant(name: str, popular: str) -> str:
+    if name.lower() == popular.lower():
+        return "case"
+    
+    folded, popular_folded = fold_homoglyphs(name), fold_homoglyphs(popular)
+    if folded == popular_folded:
+        return "homoglyph"
+    
+    if folded.translate(NAME_SEPARATORS) == popular_folded.translate(NAME_SEPARATORS):
+        return "scope" if any(c in name + popular for c in "@/") else "separator"
+    return "suffix"
+
+
+def split_segments(length: int, parts: int) -> List[Tuple[int, int]]:
+    base, extra = divmod(length, parts)
+    segments = []
+    start = 0
+    for index in range(parts):
+        size = base + (index >= parts - extra)
+        segments.append((start, size))
+        start += size
+    return segments
+
+
+class TyposquatIndex:
+    def __init__(self, names: List[str], max_distance: int = TYPOSQUAT_MAX_DISTANCE):
+        self.names = list(names)
+        self.keys = [name.lower() for name in self.names]
+        self.max_distance = max_distance
+        self.parts = max_distance + 1
+        self.segments: Dict[Tuple[int, int, str], List[int]] = {}
+        self.short: List[int] = []
+        self.canonical: Dict[str, List[int]] = {}
+        
+        self.name_set = set(self.names)
+        self.codes = pad_codes(self.keys, -1) if np is not None and self.keys else None
+        for rank, name in enumerate(self.names):
+            self.canonical.setdefault(canonical_name(name), []).append(rank)
+        
+        for rank, key in enumerate(self.keys):
+            if len(key) < self.parts:
+                self.short.append(rank)
+                continue
+            for part, (start, size) in enumerate(split_segments(len(key), self.parts)):
+                self.segments.setdefault((len(key), part, key[start:start + size]), []).append(rank)
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def candidates(self, key: str) -> set:
+        found = set(self.short)
+        k = self.max_distance
+        for length in range(max(self.parts, len(key) - k), len(key) + k + 1):
+            delta = len(key) - length
+            for part, (start, size) in enumerate(split_segments(length, self.parts)):
+                first = max(0, start - part, start + delta - (k - part))
+                last = min(len(key) - size, start + part, start + delta + (k - part))
+                for offset in range(first, last + 1):
+                    found.update(self.segments.get((length, part, key[offset:offset + size]), ()))
+        return found
+    
+    def lookup(self, name: str) -> List[Tuple[int, int]]:
+        return self.lookup_many([name])[0]
+    
+    def lookup_many(self, names: List[str]) -> List[List[Tuple[int, int]]]:
+        keys = [name.lower() for name in names]
+        positions: List[int] = []
+        ranks: List[int] = []
+        for position, (name, key) in enumerate(zip(names, keys)):
+            found = [rank for rank in sorted(self.candidates(key)) if self.names[rank] != name]
+            positions.extend([position] * len(found))
+            ranks.extend(found)
+        
+        if self.codes is None or len(ranks) < LEVENSHTEIN_BATCH_MIN:
+            distances = [
+                bounded_levenshtein(keys[p], self.keys[r], self.max_distance)
+                for p, r in zip(positions, ranks)
+            ]
+        else:
+            key_codes, key_lengths = pad_codes(keys, -2)
+            distances = bounded_levenshtein_indexed(
+                key_codes, key_lengths, np.array(positions),
+                self.codes[0], self.codes[1], np.array(ranks),
+                self.max_distance
+            ).tolist()
+        
+        hits: List[List[Tuple[int, int]]] = [[] for _ in names]
+        for position, rank, distance in zip(positions, ranks, distances):
+            if distance <= self.max_distance:
+                hits[position].append((rank, distance))
+        return hits
+    
+    def confusables(self, name: str) -> List[int]:
+        canonical = canonical_name(name)
+        if not canonical:
+            return []
+        
+        ranks = list(self.canonical.get(canonical, ()))
+        stripped = strip_confusable_suffix(canonical)
+        if stripped != canonical:
+            ranks.extend(self.canonical.get(stripped, ()))
+        return [rank for rank in ranks if self.names[rank] != name]
+
+
+_typosquat_index: Optional[TyposquatIndex] = None
+
+
+def get_typosquat_index() -> TyposquatIndex:
+    global _typosquat_index
+    if _typosquat_index is None:
+        _typosquat_index = TyposquatIndex(POPULAR_PACKAGES)
+    return _typosquat_index
+
+
+def load_typosquat_corpus(path: str) -> int:
+    global _typosquat_index
+    POPULAR_PACKAGES[:] = load_popular_packages(path)
+    _typosquat_index = TyposquatIndex(POPULAR_PACKAGES)
+    return len(POPULAR_PACKAGES)
+
+
+def is_popular_package(package_name: str) -> bool:
+    return package_name in get_typosquat_index().name_set
+
+
+def typosquat_matches(index: TyposquatIndex, hits: List[Tuple[int, int]]) -> Tuple[int, List[Dict[str, Any]]]:
     matches = []
     min_distance: int = 999
     
-    for popular in POPULAR_PACKAGES:
-        if popular == package_name:
-            continue
-        distance = levenshtein_distance(package_name.lower(), popular.lower())
-        if distance <= 2:
-            matches.append({
-                "popular_package": popular,
-                "distance": distance,
-                "suspicion": "high" if distance == 1 else "medium"
-            })
-            if distance < min_distance:
-                min_distance = distance
+    for rank, distance in hits:
+        matches.append({
+            "popular_package": index.names[rank],
+            "distance": distance,
+            "suspicion": "high" if distance == 1 else "medium"
+        })
+        if distance < min_distance:
+            min_distance = distance
     
     return min_distance, matches
 
 
+def find_typosquat_matches(package_name: str) -> Tuple[int, List[Dict[str, Any]]]:
+    index = get_typosquat_index()
+    return typosquat_matches(index, index.lookup(package_name))
+
+
+def find_typosquat_matches_many(package_names: List[str]) -> Dict[str, Dict[str, Any]]:
+    index = get_typosquat_index()
+    names = list(dict.fromkeys(package_names))
+    results = {}
+    
+    for name, hits in zip(names, index.lookup_many(names)):
+        min_distance, matches = typosquat_matches(index, hits)
+        confusables = find_confusable_matches(name)
+        is_popular = name in index.name_set
+        results[name] = {
+            "min_distance": min_distance,
+            "matches": matches,
+            "confusables": confusables,
+            "is_popular": is_popular,
+            "score": calculate_typosquat_score(min_distance, is_popular, bool(confusables))
+        }
+    
+    return results
+
+
+def find_confusable_matches(package_name: str) -> List[Dict[str, Any]]:
+    index = get_typosquat_index()
+    matches = []
+    
+    for rank in index.confusables(package_name):
+        popular = index.names[rank]
+        matches.append({
+            "popular_package": popular,
+            "variant": confusable_variant(package_name, popular),
+            "distance": levenshtein_distance(package_name.lower(), popular.lower()),
+            "suspicion": "high"
+        })
+    
+    return matches
+
+
 def is_free_email(email: str) -> bool:
     if not email or "@" not in email:
         return False
@@ -150,8 +521,12 @@ def calculate_dependency_score(
 
 def calculate_typosquat_score(
     min_distance: int,
-    is_popular: bool
+    is_popular: bool,
+    has_confusable: bool = False
 ) -> int:
+    if has_confusable:
+        min_distance = min(min_distance, 1)
+    
     if min_distance == 1:
         if not is_popular:
             return 90
@@ -167,9 +542,10 @@ def calculate_tarball_score(
     has_postinstall: bool,
     has_network_commands: bool,
     has_eval_function: bool,
-    has_high_entropy: bool
+    has_high_entropy: bool,
+    scan_reasons: Optional[List[str]] = None
 ) -> int:
-    score = 0
+    score = max((TARBALL_REJECTION_SCORES.get(reason, 0) for reason in scan_reasons or []), default=0)
     
     if has_postinstall:
         score += 60
@@ -240,11 +616,18 @@ def generate_flags(
     elif num_deps > 20:
         flags.append(f"Moderate dependency count: {num_deps}")
     
-    if typosquat_data.get("min_distance", 999) <= 2:
+    confusables = typosquat_data.get("confusables", [])
+    if confusables:
+        match = confusables[0]
+        flags.append(f"Possible typosquat of: {match['popular_package']} ({match['variant']} variant)")
+    elif typosquat_data.get("min_distance", 999) <= 2:
         similar = typosquat_data.get("matches", [])
         if similar:
             flags.append(f"Possible typosquat of: {similar[0]['popular_package']}")
     
+    for reason in tarball_data.get("scan_status", {}).get("reasons", []):
+        if reason in TARBALL_REJECTION_FLAGS:
+            flags.append(TARBALL_REJECTION_FLAGS[reason])
     if tarball_data.get("has_postinstall"):
         flags.append("Contains postinstall/preinstall scripts")
     if tarball_data.get("has_network_commands"):
@@ -257,47 +640,95 @@ def generate_flags(
     return flags
 
 
-def parse_version_timeline(time_data: Dict[str, str]) -> List[Dict[str, str]]:
-    timeline = []
-    for version, timestamp in time_data.items():
-        if version not in ["created", "modified"]:
-            timeline.append({
-                "version": version,
-                "date": timestamp
-            })
-    timeline.sort(key=lambda x: x["date"], reverse=True)
-    return timeline[:20]
-
-
-def analyze_publish_activity(time_data: Dict[str, str]) -> Dict[str, Any]:
-    now = datetime.utcnow()
-    releases_7d = 0
-    releases_30d = 0
-    releases_365d = 0
-    latest_date = None
-    
-    for version, timestamp in time_data.items():
-        if version in ["created", "modified"]:
+def build_release_index(time_data: Dict[str, str]) -> Dict[str, Any]:
+    entries = []
+    total = 0
+    for position, (version, timestamp) in enumerate(time_data.items()):
+        if version in NON_RELEASE_KEYS:
             continue
+        total += 1
         try:
             dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).replace(tzinfo=None)
-            age = now - dt
-            
-            if latest_date is None or dt > latest_date:
-                latest_date = dt
-            
-            if age <= timedelta(days=7):
-                releases_7d += 1
-            if age <= timedelta(days=30):
-                releases_30d += 1
-            if age <= timedelta(days=365):
-                releases_365d += 1
-        except:
+        except (AttributeError, TypeError, ValueError):
             continue
+        entries.append(((dt - RELEASE_EPOCH) // timedelta(microseconds=1), -position, version, timestamp))
+    entries.sort()
+    
+    release_index = {
+        "micros": [entry[0] for entry in entries],
+        "versions": [entry[2] for entry in entries],
+        "dates": [entry[3] for entry in entries],
+        "total": total
+    }
+    release_index["cadence"] = release_cadence(release_index)
+    return release_index
+
+
+def release_micros(dt: datetime) -> int:
+    return (dt - RELEASE_EPOCH) // timedelta(microseconds=1)
+
+
+def release_datetime(micros: int) -> datetime:
+    return RELEASE_EPOCH + timedelta(microseconds=micros)
+
+
+def count_releases_since(release_index: Dict[str, Any], since: datetime) -> int:
+    micros = release_index["micros"]
+    return len(micros) - bisect_left(micros, release_micros(since))
+
+
+def release_cadence(release_index: Dict[str, Any]) -> Dict[str, Any]:
+    micros = release_index["micros"]
+    gaps = [(later - earlier) / DAY_MICROS for earlier, later in zip(micros, micros[1:])]
+    
+    max_in_window = 0
+    bursts = 0
+    burst_end = None
+    start = 0
+    for end, current in enumerate(micros):
+        while current - micros[start] > BURST_WINDOW_MICROS:
+            start += 1
+        in_window = end - start + 1
+        max_in_window = max(max_in_window, in_window)
+        if in_window >= BURST_MIN_RELEASES and (burst_end is None or micros[start] > burst_end):
+            bursts += 1
+            burst_end = current
+    
+    return {
+        "median_gap_days": round(statistics.median(gaps), 2) if gaps else None,
+        "mean_gap_days": round(statistics.fmean(gaps), 2) if gaps else None,
+        "max_gap_days": round(max(gaps), 2) if gaps else None,
+        "last_gap_days": round(gaps[-1], 2) if gaps else None,
+        "max_releases_24h": max_in_window,
+        "bursts": bursts
+    }
+
+
+def parse_version_timeline(
+    time_data: Dict[str, str],
+    release_index: Optional[Dict[str, Any]] = None,
+    limit: int = TIMELINE_LENGTH
+) -> List[Dict[str, str]]:
+    release_index = release_index or build_release_index(time_data)
+    versions = release_index["versions"][-limit:][::-1] if limit else []
+    dates = release_index["dates"][-limit:][::-1] if limit else []
+    return [{"version": version, "date": date} for version, date in zip(versions, dates)]
+
+
+def analyze_publish_activity(
+    time_data: Dict[str, str],
+    release_index: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    release_index = release_index or build_release_index(time_data)
+    now = datetime.utcnow()
+    
+    releases_7d = count_releases_since(release_index, now - timedelta(days=7))
+    releases_30d = count_releases_since(release_index, now - timedelta(days=30))
+    releases_365d = count_releases_since(release_index, now - timedelta(days=365))
+    latest_date = release_datetime(release_index["micros"][-1]) if release_index["micros"] else None
     
-    total_releases = len([v for v in time_data.keys() if v not in ["created", "modified"]])
     is_dormant_then_sudden = (
-        total_releases > 1 and
+        release_index["total"] > 1 and
         releases_365d <= 2 and
         releases_30d >= 1
     )
@@ -309,7 +740,8 @@ def analyze_publish_activity(time_data: Dict[str, str]) -> Dict[str, Any]:
         "releases_last_30d": releases_30d,
         "is_dormant_then_sudden": is_dormant_then_sudden,
         "latest_age_days": latest_age_days,
-        "latest_release_date": latest_date.isoformat() if latest_date else None
+        "latest_release_date": latest_date.isoformat() if latest_date else None,
+        "cadence": release_index.get("cadence") or release_cadence(release_index)
     }
 
 
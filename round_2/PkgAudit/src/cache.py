@@ -0,0 +1,733 @@
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+CACHE_PRAGMAS = [
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=67108864",
+    "PRAGMA busy_timeout=0"
+]
+
+LOCK_RETRY_TIMEOUT_SECONDS = 5.0
+LOCK_RETRY_INITIAL_DELAY = 0.002
+LOCK_RETRY_MAX_DELAY = 0.1
+STATEMENT_CACHE_SIZE = 256
+
+MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+MEMORY_CACHE_TTL_SECONDS = 5 * 60
+
+CACHE_READER_THREADS = 4
+CACHE_WRITE_BATCH_SIZE = 128
+
+CACHE_FORMAT_JSON = 1
+CACHE_FORMAT_ZLIB_JSON = 2
+CACHE_COMPRESSION_LEVEL = 6
+MIGRATION_BATCH_SIZE = 200
+
+CACHE_SWEEP_INTERVAL_SECONDS = 300
+INCREMENTAL_VACUUM_PAGES = 2000
+MB = 1024 * 1024
+DAY_SECONDS = 24 * 60 * 60
+
+CACHE_BUDGETS = {
+    "registry_cache": {"max_rows": 20000, "max_bytes": 256 * MB, "max_age_seconds": 7 * DAY_SECONDS},
+    "abbreviated_cache": {"max_rows": 50000, "max_bytes": 128 * MB, "max_age_seconds": 7 * DAY_SECONDS},
+    "report_cache": {"max_rows": 20000, "max_bytes": 128 * MB, "max_age_seconds": DAY_SECONDS},
+    "file_findings_cache": {"max_rows": 500000, "max_bytes": 128 * MB, "max_age_seconds": 30 * DAY_SECONDS},
+    "tarball_cache": {"max_rows": 100000, "max_bytes": 64 * MB}
+}
+
+REGISTRY_COLUMNS = {
+    "data": "TEXT",
+    "cached_at": "REAL",
+    "etag": "TEXT",
+    "last_modified": "TEXT",
+    "format": "INTEGER",
+    "raw_size": "INTEGER",
+    "accessed_at": "REAL"
+}
+
+CACHE_TABLES = {
+    "registry_cache": REGISTRY_COLUMNS,
+    "abbreviated_cache": REGISTRY_COLUMNS,
+    "report_cache": {
+        "report": "TEXT",
+        "cached_at": "REAL",
+        "format": "INTEGER",
+        "raw_size": "INTEGER",
+        "accessed_at": "REAL"
+    },
+    "file_findings_cache": {
+        "findings": "TEXT",
+        "ruleset": "TEXT",
+        "cached_at": "REAL",
+        "format": "INTEGER",
+        "raw_size": "INTEGER",
+        "accessed_at": "REAL"
+    },
+    "tarball_cache": {
+        "findings": "TEXT",
+        "ruleset": "TEXT",
+        "cached_at": "REAL",
+        "format": "INTEGER",
+        "raw_size": "INTEGER",
+        "accessed_at": "REAL"
+    }
+}
+
+PAYLOAD_COLUMNS = {
+    "registry_cache": "data",
+    "abbreviated_cache": "data",
+    "report_cache": "report",
+    "file_findings_cache": "findings",
+    "tarball_cache": "findings"
+}
+
+
+def serialize_response(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def encode_payload(value: Any, compress: bool = True) -> Tuple[Any, int, int]:
+    text = json.dumps(value, separators=(",", ":"))
+    raw = text.encode("utf-8")
+    if compress:
+        return zlib.compress(raw, CACHE_COMPRESSION_LEVEL), CACHE_FORMAT_ZLIB_JSON, len(raw)
+    return text, CACHE_FORMAT_JSON, len(raw)
+
+
+def decode_payload(stored: Any, format: Optional[int]) -> Any:
+    if format == CACHE_FORMAT_ZLIB_JSON:
+        return json.loads(zlib.decompress(stored))
+    return json.loads(stored)
+
+
+def is_lock_error(error: sqlite3.Error) -> bool:
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+class CacheEngine:
+    def __init__(
+        self,
+        db_path: str,
+        tables: Optional[Dict[str, Dict[str, str]]] = None,
+        budgets: Optional[Dict[str, Dict[str, float]]] = None
+    ):
+        self.db_path = db_path
+        self.tables = tables or CACHE_TABLES
+        self.budgets = CACHE_BUDGETS if budgets is None else budgets
+        self._accessed: Dict[str, Dict[str, float]] = {}
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._sql: Dict[Tuple[str, ...], str] = {}
+        self._stats = {
+            "hits": {table: 0 for table in self.tables},
+            "misses": {table: 0 for table in self.tables},
+            "expired": {table: 0 for table in self.tables},
+            "writes": {table: 0 for table in self.tables},
+            "transactions": 0,
+            "errors": 0,
+            "lock_waits": 0,
+            "lock_wait_seconds": 0.0,
+            "evicted": {table: 0 for table in self.tables},
+            "expired_deleted": {table: 0 for table in self.tables},
+            "sweeps": 0,
+            "vacuumed_pages": 0,
+            "last_sweep_seconds": 0.0
+        }
+    
+    def connection(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.initialize()
+        return self._thread_connection()
+    
+    def _thread_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            for pragma in CACHE_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
+    def initialize(self):
+        def create(conn: sqlite3.Connection):
+            for table, columns in self.tables.items():
+                column_defs = ", ".join(f"{name} {kind}" for name, kind in columns.items())
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (package_name TEXT PRIMARY KEY, {column_defs})")
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for name, kind in columns.items():
+                    if name not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+                if "accessed_at" in columns:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed_at ON {table} (accessed_at)")
+        
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn = self._thread_connection()
+            self._run(lambda c: self._transaction(c, create), conn)
+            self._initialized = True
+    
+    def close(self):
+        self.stop_sweeper()
+        if self._initialized:
+            try:
+                self.flush_access()
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._initialized = False
+        self._local = threading.local()
+    
+    def _statement(self, *parts: str) -> str:
+        sql = self._sql.get(parts)
+        if sql is None:
+            kind, table = parts[0], parts[1]
+            columns = list(parts[2:])
+            if kind == "select":
+                sql = f"SELECT {', '.join(columns)} FROM {table} WHERE package_name = ?"
+            elif kind == "delete":
+                sql = f"DELETE FROM {table} WHERE package_name = ?"
+            elif kind == "upsert":
+                names = ", ".join(["package_name"] + columns)
+                placeholders = ", ".join("?" * (len(columns) + 1))
+                sql = f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({placeholders})"
+            else:
+                assignments = ", ".join(f"{name} = ?" for name in columns)
+                sql = f"UPDATE {table} SET {assignments} WHERE package_name = ?"
+            self._sql[parts] = sql
+        return sql
+    
+    def _run(self, operation, conn: Optional[sqlite3.Connection] = None):
+        started = None
+        delay = LOCK_RETRY_INITIAL_DELAY
+        while True:
+            try:
+                return operation(conn or self.connection())
+            except sqlite3.Error as e:
+                now = time.monotonic()
+                if started is None:
+                    started = now
+                if not is_lock_error(e) or now - started > LOCK_RETRY_TIMEOUT_SECONDS:
+                    with self._lock:
+                        self._stats["errors"] += 1
+                    raise
+                time.sleep(delay)
+                with self._lock:
+                    self._stats["lock_waits"] += 1
+                    self._stats["lock_wait_seconds"] += delay
+                delay = min(delay * 2, LOCK_RETRY_MAX_DELAY)
+    
+    def _transaction(self, conn: sqlite3.Connection, operation):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = operation(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        with self._lock:
+            self._stats["transactions"] += 1
+        return result
+    
+    def write(self, operation):
+        return self._run(lambda conn: self._transaction(conn, operation))
+    
+    def get(self, table: str, key: str, columns: List[str]) -> Optional[Dict[str, Any]]:
+        sql = self._statement("select", table, *columns)
+        row = self._run(lambda conn: conn.execute(sql, (key,)).fetchone())
+        if row is None:
+            return None
+        return dict(zip(columns, row))
+    
+    def get_fresh(self, table: str, key: str, columns: List[str], ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        row = self.get(table, key, columns + ["cached_at"])
+        
+        with self._lock:
+            if row is None:
+                self._stats["misses"][table] += 1
+                return None
+            if row["cached_at"] is None or time.time() - row["cached_at"] >= ttl_seconds:
+                self._stats["expired"][table] += 1
+                self._stats["misses"][table] += 1
+                return None
+            self._stats["hits"][table] += 1
+            if "accessed_at" in self.tables[table]:
+                self._accessed.setdefault(table, {})[key] = time.time()
+        return row
+    
+    def put(self, table: str, key: str, values: Dict[str, Any]):
+        self.put_many(table, [(key, values)])
+    
+    def put_many(self, table: str, rows: Iterable[Tuple[str, Dict[str, Any]]]):
+        rows = list(rows)
+        if not rows:
+            return
+        
+        grouped: Dict[Tuple[str, ...], List[Tuple[Any, ...]]] = {}
+        for key, values in rows:
+            values = self._with_access_time(table, values)
+            columns = tuple(values.keys())
+            grouped.setdefault(columns, []).append((key, *values.values()))
+        
+        def insert(conn: sqlite3.Connection):
+            for columns, params in grouped.items():
+                conn.executemany(self._statement("upsert", table, *columns), params)
+        
+        self.write(insert)
+        with self._lock:
+            self._stats["writes"][table] += len(rows)
+    
+    def _with_access_time(self, table: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        if "accessed_at" in self.tables[table] and "accessed_at" not in values:
+            return {**values, "accessed_at": time.time()}
+        return values
+    
+    def update(self, table: str, key: str, values: Dict[str, Any]):
+        self.apply_writes([("update", table, key, values)])
+    
+    def apply_writes(self, operations: Iterable[Tuple[str, str, str, Dict[str, Any]]]):
+        operations = list(operations)
+        if not operations:
+            return
+        
+        def apply(conn: sqlite3.Connection):
+            for kind, table, key, values in operations:
+                if kind == "upsert":
+                    values = self._with_access_time(table, values)
+                sql = self._statement(kind, table, *values.keys())
+                if kind == "delete":
+                    conn.execute(sql, (key,))
+                elif kind == "upsert":
+                    conn.execute(sql, (key, *values.values()))
+                else:
+                    conn.execute(sql, (*values.values(), key))
+        
+        self.write(apply)
+        with self._lock:
+            for _, table, _, _ in operations:
+                self._stats["writes"][table] += 1
+    
+    def rewrite_payloads(
+        self,
+        table: str,
+        transform: Callable[[Any, Optional[int]], Optional[Tuple[Any, int, int]]],
+        target_format: int
+    ) -> int:
+        payload = PAYLOAD_COLUMNS[table]
+        select = (
+            f"SELECT package_name, {payload}, format FROM {table} "
+            "WHERE (format IS NULL OR format != ?) AND package_name > ? ORDER BY package_name LIMIT ?"
+        )
+        rewritten = 0
+        last_key = ""
+        while True:
+            rows = self._run(
+                lambda conn: conn.execute(select, (target_format, last_key, MIGRATION_BATCH_SIZE)).fetchall()
+            )
+            if not rows:
+                return rewritten
+            
+            operations = []
+            for key, stored, format in rows:
+                encoded = transform(stored, format)
+                if encoded is None:
+                    operations.append(("delete", table, key, {}))
+                    continue
+                new_stored, new_format, raw_size = encoded
+                operations.append(("update", table, key, {
+                    payload: new_stored,
+                    "format": new_format,
+                    "raw_size": raw_size
+                }))
+            self.apply_writes(operations)
+            rewritten += len(rows)
+            last_key = rows[-1][0]
+    
+    def flush_access(self) -> int:
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        params = {
+            table: [(accessed_at, key) for key, accessed_at in keys.items()]
+            for table, keys in accessed.items()
+        }
+        
+        def apply(conn: sqlite3.Connection):
+            for table, rows in params.items():
+                conn.executemany(self._statement("update", table, "accessed_at"), rows)
+        
+        if params:
+            self.write(apply)
+        return sum(len(rows) for rows in params.values())
+    
+    def delete_expired(self, table: str, max_age_seconds: float) -> int:
+        cutoff = time.time() - max_age_seconds
+        deleted = self.write(
+            lambda conn: conn.execute(f"DELETE FROM {table} WHERE cached_at < ?", (cutoff,)).rowcount
+        )
+        with self._lock:
+            self._stats["expired_deleted"][table] += deleted
+        return deleted
+    
+    def evict(self, table: str) -> int:
+        budget = self.budgets.get(table)
+        if not budget:
+            return 0
+        payload = PAYLOAD_COLUMNS[table]
+        
+        def evict_oldest(conn: sqlite3.Connection) -> int:
+            rows, size = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length({payload})), 0) FROM {table}"
+            ).fetchone()
+            excess_rows = rows - budget.get("max_rows", rows)
+            excess_bytes = size - budget.get("max_bytes", size)
+            if excess_rows <= 0 and excess_bytes <= 0:
+                return 0
+            
+            victims = []
+            for key, length in conn.execute(
+                f"SELECT package_name, length({payload}) FROM {table} ORDER BY accessed_at ASC"
+            ):
+                if excess_rows <= 0 and excess_bytes <= 0:
+                    break
+                victims.append((key,))
+                excess_rows -= 1
+                excess_bytes -= length or 0
+            conn.executemany(self._statement("delete", table), victims)
+            return len(victims)
+        
+        evicted = self.write(evict_oldest)
+        with self._lock:
+            self._stats["evicted"][table] += evicted
+        return evicted
+    
+    def incremental_vacuum(self, pages: int = INCREMENTAL_VACUUM_PAGES) -> int:
+        conn = self.connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self._run(lambda c: c.execute("PRAGMA auto_vacuum=INCREMENTAL"))
+            self.vacuum()
+            return 0
+        
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        self._run(lambda c: c.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall())
+        freed = before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        with self._lock:
+            self._stats["vacuumed_pages"] += freed
+        return freed
+    
+    def sweep(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        self.flush_access()
+        
+        result = {"expired": {}, "evicted": {}}
+        for table, budget in self.budgets.items():
+            if table not in self.tables:
+                continue
+            max_age = budget.get("max_age_seconds")
+            result["expired"][table] = self.delete_expired(table, max_age) if max_age else 0
+            result["evicted"][table] = self.evict(table)
+        result["vacuumed_pages"] = self.incremental_vacuum()
+        
+        with self._lock:
+            self._stats["sweeps"] += 1
+            self._stats["last_sweep_seconds"] = round(time.monotonic() - started, 4)
+        return result
+    
+    def start_sweeper(self, interval_seconds: float = CACHE_SWEEP_INTERVAL_SECONDS):
+        if self._sweeper is not None:
+            return
+        
+        def run():
+            while not self._sweeper_stop.wait(interval_seconds):
+                try:
+                    self.sweep()
+                except sqlite3.Error as e:
+                    print(f"Cache sweep failed: {e}")
+        
+        self._sweeper_stop.clear()
+        self._sweeper = threading.Thread(target=run, name="cache-sweeper", daemon=True)
+        self._sweeper.start()
+    
+    def stop_sweeper(self):
+        if self._sweeper is None:
+            return
+        self._sweeper_stop.set()
+        self._sweeper.join()
+        self._sweeper = None
+    
+    def vacuum(self):
+        self._run(lambda conn: conn.execute("VACUUM"))
+        self._run(lambda conn: conn.execute("PRAGMA wal_checkpoint(TRUNCATE)"))
+    
+    def storage_stats(self) -> Dict[str, Any]:
+        conn = self.connection()
+        tables = {}
+        for table in self.tables:
+            payload = PAYLOAD_COLUMNS.get(table)
+            if payload is None:
+                continue
+            rows, raw_bytes, stored_bytes = self._run(lambda c: c.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(COALESCE(raw_size, length({payload}))), 0), "
+                f"COALESCE(SUM(length({payload})), 0) FROM {table}"
+            ).fetchone())
+            tables[table] = {
+                "rows": rows,
+                "raw_bytes": raw_bytes,
+                "stored_bytes": stored_bytes,
+                "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else 0.0
+            }
+        
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        wal_path = self.db_path + "-wal"
+        return {
+            "tables": tables,
+            "db_bytes": page_count * page_size,
+            "wal_bytes": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(self._stats["hits"].values())
+            misses = sum(self._stats["misses"].values())
+            return {
+                "db_path": self.db_path,
+                "connections": len(self._connections),
+                "hits": dict(self._stats["hits"]),
+                "misses": dict(self._stats["misses"]),
+                "expired": dict(self._stats["expired"]),
+                "writes": dict(self._stats["writes"]),
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "transactions": self._stats["transactions"],
+                "errors": self._stats["errors"],
+                "lock_waits": self._stats["lock_waits"],
+                "lock_wait_seconds": round(self._stats["lock_wait_seconds"], 4),
+                "evicted": dict(self._stats["evicted"]),
+                "expired_deleted": dict(self._stats["expired_deleted"]),
+                "sweeps": self._stats["sweeps"],
+                "vacuumed_pages": self._stats["vacuumed_pages"],
+                "last_sweep_seconds": self._stats["last_sweep_seconds"],
+                "budgets": self.budgets
+            }
+
+
+class MemoryCache:
+    def __init__(self, max_bytes: int = MEMORY_CACHE_MAX_BYTES, ttl_seconds: float = MEMORY_CACHE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[Any, bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+    
+    def get(self, key: str) -> Optional[Tuple[Any, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() >= entry[2]:
+                if entry is not None:
+                    self._remove(key)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0], entry[1]
+    
+    def put(self, key: str, value: Any, body: bytes, expires_at: Optional[float] = None):
+        expires_at = min(expires_at or float("inf"), time.time() + self.ttl_seconds)
+        with self._lock:
+            self._remove(key)
+            if len(body) > self.max_bytes:
+                return
+            self._entries[key] = (value, body, expires_at)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+    
+    def invalidate(self, key: str):
+        with self._lock:
+            if self._remove(key):
+                self._stats["invalidations"] += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry[1])
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+class AsyncCache:
+    def __init__(
+        self,
+        engine: CacheEngine,
+        reader_threads: int = CACHE_READER_THREADS,
+        batch_size: int = CACHE_WRITE_BATCH_SIZE
+    ):
+        self.engine = engine
+        self.reader_threads = reader_threads
+        self.batch_size = batch_size
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._writer: Optional[threading.Thread] = None
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {
+            "reads": 0,
+            "queued_writes": 0,
+            "write_batches": 0,
+            "max_batch_size": 0
+        }
+    
+    def _start(self):
+        with self._lock:
+            if self._readers is None:
+                self._readers = ThreadPoolExecutor(
+                    max_workers=self.reader_threads,
+                    thread_name_prefix="cache-reader"
+                )
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="cache-writer", daemon=True)
+                self._writer.start()
+    
+    async def run(self, operation, *args):
+        if self._readers is None:
+            self._start()
+        return await asyncio.get_running_loop().run_in_executor(self._readers, operation, *args)
+    
+    async def read(self, operation, *args):
+        with self._lock:
+            self._stats["reads"] += 1
+        return await self.run(operation, *args)
+    
+    async def get(self, table: str, key: str, columns: List[str]) -> Optional[Dict[str, Any]]:
+        return await self.read(self.engine.get, table, key, columns)
+    
+    async def get_fresh(self, table: str, key: str, columns: List[str], ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        return await self.read(self.engine.get_fresh, table, key, columns, ttl_seconds)
+    
+    async def put(self, table: str, key: str, values: Dict[str, Any]):
+        await self._enqueue(("upsert", table, key, values))
+    
+    async def update(self, table: str, key: str, values: Dict[str, Any]):
+        await self._enqueue(("update", table, key, values))
+    
+    async def _enqueue(self, operation: Tuple[str, str, str, Dict[str, Any]]):
+        if self._writer is None:
+            self._start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._stats["queued_writes"] += 1
+        self._queue.put((operation, loop, future))
+        await future
+    
+    def _write_loop(self):
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            
+            error = None
+            try:
+                self.engine.apply_writes(operation for operation, _, _ in batch)
+            except Exception as e:
+                error = e
+            
+            with self._lock:
+                self._stats["write_batches"] += 1
+                self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            
+            for _, loop, future in batch:
+                try:
+                    loop.call_soon_threadsafe(_resolve_future, future, error)
+                except RuntimeError:
+                    continue
+    
+    def close(self):
+        with self._lock:
+            writer, readers = self._writer, self._readers
+            self._writer, self._readers = None, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+        if readers is not None:
+            readers.shutdown(wait=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pending_writes"] = self._queue.qsize()
+        stats["reader_threads"] = self.reader_threads
+        batches = stats["write_batches"]
+        written = stats["queued_writes"] - stats["pending_writes"]
+        stats["avg_batch_size"] = round(written / batches, 2) if batches else 0.0
+        return stats
+
+
+def _resolve_future(future: asyncio.Future, error: Optional[BaseException]):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(None)
@@ -6,10 +6,21 @@ import asyncio
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from registry import fetch_package_metadata, extract_package_info, download_tarball, init_cache, set_cached_report
-from tarball_scanner import scan_tarball, get_tarball_summary
+from registry import (
+    fetch_package_metadata,
+    extract_package_info,
+    init_cache,
+    close_cache_engine,
+    migrate_cache,
+    set_cached_report,
+    start_http_client,
+    close_http_client
+)
+from tarball_scanner import scan_remote_stream, get_tarball_summary
 from audit import (
     find_typosquat_matches,
+    find_confusable_matches,
+    is_popular_package,
     calculate_publish_activity_score,
     calculate_maintainer_score,
     calculate_dependency_score,
@@ -21,16 +32,23 @@ from audit import (
     parse_version_timeline,
     analyze_publish_activity,
     analyze_maintainers,
-    analyze_dependencies,
-    POPULAR_PACKAGES
+    analyze_dependencies
 )
 from datetime import datetime
-import tempfile
 
 
 async def audit_package(package_name: str) -> dict:
     init_cache()
     
+    await start_http_client()
+    try:
+        return await run_audit(package_name)
+    finally:
+        await close_http_client()
+        close_cache_engine()
+
+
+async def run_audit(package_name: str) -> dict:
     metadata = await fetch_package_metadata(package_name)
     
     if "error" in metadata:
@@ -41,7 +59,7 @@ async def audit_package(package_name: str) -> dict:
     if "error" in pkg_info:
         return pkg_info
     
-    publish_data = analyze_publish_activity(pkg_info.get("time", {}))
+    publish_data = analyze_publish_activity(pkg_info.get("time", {}), pkg_info.get("release_index"))
     maintainer_data = analyze_maintainers(
         pkg_info.get("maintainers", []),
         pkg_info.get("repository")
@@ -49,9 +67,11 @@ async def audit_package(package_name: str) -> dict:
     dependency_data = analyze_dependencies(pkg_info.get("dependencies", {}))
     
     min_distance, typosquat_matches = find_typosquat_matches(package_name)
+    confusable_matches = find_confusable_matches(package_name)
     typosquat_data = {
         "min_distance": min_distance,
-        "matches": typosquat_matches
+        "matches": typosquat_matches,
+        "confusables": confusable_matches
     }
     
     tarball_findings = {
@@ -68,17 +88,15 @@ async def audit_package(package_name: str) -> dict:
     
     tarball_url = pkg_info.get("tarball_url", "")
     if tarball_url:
-        with tempfile.NamedTemporaryFile(suffix=".tgz", delete=False) as tmp:
-            tmp_path = tmp.name
-        
-        try:
-            if await download_tarball(tarball_url, tmp_path):
-                tarball_findings = scan_tarball(tmp_path)
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-    
-    is_popular = package_name in POPULAR_PACKAGES
+        streamed_findings = await scan_remote_stream(
+            tarball_url,
+            integrity=pkg_info.get("integrity"),
+            shasum=pkg_info.get("shasum")
+        )
+        if streamed_findings is not None:
+            tarball_findings = streamed_findings
+    
+    is_popular = is_popular_package(package_name)
     
     publish_score = calculate_publish_activity_score(
         publish_data["releases_last_7d"],
@@ -100,13 +118,14 @@ async def audit_package(package_name: str) -> dict:
         dependency_data["missing_repo_count"]
     )
     
-    typosquat_score = calculate_typosquat_score(min_distance, is_popular)
+    typosquat_score = calculate_typosquat_score(min_distance, is_popular, bool(confusable_matches))
     
     tarball_score = calculate_tarball_score(
         tarball_findings["has_postinstall"],
         tarball_findings["has_network_commands"],
         tarball_findings["has_eval_function"],
-        tarball_findings["has_high_entropy"]
+        tarball_findings["has_high_entropy"],
+        tarball_findings.get("scan_status", {}).get("reasons")
     )
     
     final_score = calculate_final_risk_score(
@@ -127,7 +146,7 @@ async def audit_package(package_name: str) -> dict:
         tarball_findings
     )
     
-    timeline = parse_version_timeline(pkg_info.get("time", {}))
+    timeline = parse_version_timeline(pkg_info.get("time", {}), pkg_info.get("release_index"))
     tarball_summary = get_tarball_summary(tarball_findings)
     
     report = {
@@ -146,11 +165,14 @@ async def audit_package(package_name: str) -> dict:
         "evidence": {
             "maintainers": pkg_info.get("maintainers", []),
             "latest_release_date": publish_data.get("latest_release_date"),
+            "publish_cadence": publish_data.get("cadence"),
             "tarball_findings": tarball_summary,
+            "tarball_scan": tarball_findings.get("scan_status"),
             "publish_timeline": timeline[:10],
             "repository": pkg_info.get("repository"),
             "dependencies_count": dependency_data["count"],
             "typosquat_matches": typosquat_matches,
+            "confusable_matches": confusable_matches,
             "description": pkg_info.get("description", ""),
             "license": pkg_info.get("license", "unknown"),
             "homepage": pkg_info.get("homepage", "")
@@ -158,7 +180,7 @@ async def audit_package(package_name: str) -> dict:
         "timestamp": datetime.utcnow().isoformat() + "Z"
     }
     
-    set_cached_report(package_name, report)
+    await set_cached_report(package_name, report)
     
     return report
 
@@ -167,8 +189,16 @@ def main():
     if len(sys.argv) < 2:
         print("Usage: python cli.py <package-name>", file=sys.stderr)
         print("Example: python cli.py express", file=sys.stderr)
+        print("         python cli.py --migrate-cache", file=sys.stderr)
         sys.exit(1)
     
+    if sys.argv[1] == "--migrate-cache":
+        init_cache()
+        result = migrate_cache()
+        close_cache_engine()
+        print(json.dumps(result, indent=2))
+        return
+    
     package_name = sys.argv[1].strip().lower()
     
     if not package_name:
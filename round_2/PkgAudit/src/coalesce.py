@@ -0,0 +1,31 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+_inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+async def coalesce(level: str, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    counters = _stats.setdefault(level, {"executed": 0, "coalesced": 0})
+    inflight_key = (level, key)
+    
+    task = _inflight.get(inflight_key)
+    if task is not None:
+        counters["coalesced"] += 1
+    else:
+        counters["executed"] += 1
+        task = asyncio.ensure_future(factory())
+        _inflight[inflight_key] = task
+        task.add_done_callback(lambda _: _inflight.pop(inflight_key, None))
+    
+    return await asyncio.shield(task)
+
+
+def get_coalescing_stats() -> Dict[str, Any]:
+    stats = {level: dict(counters) for level, counters in _stats.items()}
+    stats["in_flight"] = len(_inflight)
+    return stats
+
+
+def reset_coalescing_stats():
+    _stats.clear()
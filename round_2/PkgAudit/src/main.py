@@ -1,12 +1,12 @@
 import os
 import sys
 import json
-import tempfile
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional
 
 from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
@@ -15,14 +15,45 @@ sys.path.insert(0, os.path.dirname(__file__))
 from registry import (
     fetch_package_metadata,
     extract_package_info,
-    download_tarball,
     get_cached_report,
+    get_cached_report_body,
     set_cached_report,
-    init_cache
+    init_cache,
+    get_cache_engine,
+    close_cache_engine,
+    get_cache_stats,
+    start_http_client,
+    close_http_client,
+    get_http_stats
+)
+from tarball_scanner import (
+    scan_remote_stream,
+    empty_findings,
+    get_tarball_summary,
+    get_prefilter_stats,
+    get_file_cache_stats,
+    start_scan_pool,
+    close_scan_pool,
+    get_scan_pool_stats,
+    configure_scan_policy,
+    SCAN_POOL_WORKERS,
+    SCAN_POLICY
+)
+from coalesce import coalesce, get_coalescing_stats
+from workers import (
+    WorkerPoolFull,
+    start_worker_pool,
+    close_worker_pool,
+    run_in_worker,
+    get_worker_stats,
+    WORKER_THREADS,
+    WORKER_QUEUE_DEPTH,
+    STREAM_SCAN_THREADS
 )
-from tarball_scanner import scan_tarball, get_tarball_summary
 from audit import (
     find_typosquat_matches,
+    find_confusable_matches,
+    is_popular_package,
     calculate_publish_activity_score,
     calculate_maintainer_score,
     calculate_dependency_score,
@@ -35,13 +66,45 @@ from audit import (
     analyze_publish_activity,
     analyze_maintainers,
     analyze_dependencies,
-    POPULAR_PACKAGES
+    get_typosquat_index,
+    load_typosquat_corpus
 )
 
+HTTP2_ENABLED = os.environ.get("PKGAUDIT_HTTP2", "").lower() in ("1", "true", "yes")
+SCAN_WORKERS = int(os.environ.get("PKGAUDIT_SCAN_WORKERS", SCAN_POOL_WORKERS))
+WORKERS = int(os.environ.get("PKGAUDIT_WORKERS", WORKER_THREADS))
+WORKER_QUEUE = int(os.environ.get("PKGAUDIT_WORKER_QUEUE", WORKER_QUEUE_DEPTH))
+STREAM_SCANS = int(os.environ.get("PKGAUDIT_STREAM_SCANS", STREAM_SCAN_THREADS))
+SCAN_DEADLINE = float(os.environ.get("PKGAUDIT_SCAN_DEADLINE", SCAN_POLICY["deadline_seconds"]))
+SCAN_STOP_SATURATED = os.environ.get("PKGAUDIT_SCAN_STOP_SATURATED", "").lower() in ("1", "true", "yes")
+POPULAR_PACKAGES_PATH = os.environ.get("PKGAUDIT_POPULAR_PACKAGES")
+RETRY_AFTER_SECONDS = 5
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client(http2=HTTP2_ENABLED)
+    get_cache_engine().start_sweeper()
+    start_scan_pool(SCAN_WORKERS)
+    configure_scan_policy(deadline_seconds=SCAN_DEADLINE, stop_when_saturated=SCAN_STOP_SATURATED)
+    start_worker_pool(WORKERS, WORKER_QUEUE, STREAM_SCANS)
+    if POPULAR_PACKAGES_PATH:
+        load_typosquat_corpus(POPULAR_PACKAGES_PATH)
+    get_typosquat_index()
+    try:
+        yield
+    finally:
+        await close_http_client()
+        close_worker_pool()
+        close_cache_engine()
+        close_scan_pool()
+
+
 app = FastAPI(
     title="PkgAudit",
     description="npm Package Ecosystem Auditor - Software Supply Chain Security Tool",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 BASE_DIR = os.path.dirname(__file__)
@@ -61,6 +124,21 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/api/stats")
+async def stats():
+    return {
+        "http": get_http_stats(),
+        "cache": await get_cache_stats(),
+        "coalescing": get_coalescing_stats(),
+        "scanner": {
+            "prefilter": get_prefilter_stats(),
+            "pool": get_scan_pool_stats(),
+            "file_cache": get_file_cache_stats()
+        },
+        "workers": get_worker_stats()
+    }
+
+
 @app.get("/api/audit")
 async def api_audit(pkg: str):
     if not pkg or not pkg.strip():
@@ -68,14 +146,18 @@ async def api_audit(pkg: str):
     
     pkg = pkg.strip().lower()
     
-    cached = get_cached_report(pkg)
-    if cached:
-        return JSONResponse(content=cached)
+    body = await get_cached_report_body(pkg)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
     
-    report = await perform_audit(pkg)
-    
-    if "error" not in report:
-        set_cached_report(pkg, report)
+    try:
+        report = await create_report(pkg)
+    except WorkerPoolFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy auditing other packages, please retry shortly",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
     
     return JSONResponse(content=report)
 
@@ -90,13 +172,13 @@ async def audit_form(request: Request, package: str = Form(...)):
     
     package = package.strip().lower()
     
-    cached = get_cached_report(package)
-    if cached:
-        report = cached
-    else:
-        report = await perform_audit(package)
-        if "error" not in report:
-            set_cached_report(package, report)
+    try:
+        report = await get_or_create_report(package)
+    except WorkerPoolFull:
+        return templates.TemplateResponse("index.html", {
+            "request": request,
+            "error": "Server is busy auditing other packages, please retry shortly"
+        }, status_code=503, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
     
     if "error" in report:
         return templates.TemplateResponse("index.html", {
@@ -113,12 +195,49 @@ async def audit_form(request: Request, package: str = Form(...)):
 
 @app.get("/api/report/{package}.json")
 async def get_report(package: str):
-    cached = get_cached_report(package.lower())
-    if cached:
-        return JSONResponse(content=cached)
+    body = await get_cached_report_body(package.lower())
+    if body is not None:
+        return Response(content=body, media_type="application/json")
     raise HTTPException(status_code=404, detail="Report not found in cache")
 
 
+async def get_or_create_report(package_name: str) -> dict:
+    cached = await get_cached_report(package_name)
+    if cached:
+        return cached
+    
+    return await create_report(package_name)
+
+
+async def create_report(package_name: str) -> dict:
+    return await coalesce("report", package_name, lambda: audit_and_cache(package_name))
+
+
+async def audit_and_cache(package_name: str) -> dict:
+    report = await perform_audit(package_name)
+    
+    if "error" not in report:
+        await set_cached_report(package_name, report)
+    
+    return report
+
+
+async def scan_remote_tarball(package_name: str, version: str, pkg_info: dict) -> Optional[dict]:
+    return await coalesce(
+        "tarball",
+        f"{package_name}@{version}",
+        lambda: download_and_scan(pkg_info)
+    )
+
+
+async def download_and_scan(pkg_info: dict) -> dict:
+    return await scan_remote_stream(
+        pkg_info["tarball_url"],
+        integrity=pkg_info.get("integrity"),
+        shasum=pkg_info.get("shasum")
+    )
+
+
 async def perform_audit(package_name: str) -> dict:
     try:
         metadata = await fetch_package_metadata(package_name)
@@ -131,130 +250,130 @@ async def perform_audit(package_name: str) -> dict:
         if "error" in pkg_info:
             return pkg_info
         
-        publish_data = analyze_publish_activity(pkg_info.get("time", {}))
-        maintainer_data = analyze_maintainers(
-            pkg_info.get("maintainers", []),
-            pkg_info.get("repository")
-        )
-        dependency_data = analyze_dependencies(pkg_info.get("dependencies", {}))
-        
-        min_distance, typosquat_matches = find_typosquat_matches(package_name)
-        typosquat_data = {
-            "min_distance": min_distance,
-            "matches": typosquat_matches
-        }
-        
-        tarball_findings = {
-            "has_postinstall": False,
-            "has_network_commands": False,
-            "has_eval_function": False,
-            "has_high_entropy": False,
-            "install_scripts": [],
-            "suspicious_files": [],
-            "high_entropy_strings": [],
-            "network_patterns": [],
-            "eval_patterns": []
-        }
+        tarball_findings = empty_findings()
         
         tarball_url = pkg_info.get("tarball_url", "")
         if tarball_url:
-            with tempfile.NamedTemporaryFile(suffix=".tgz", delete=False) as tmp:
-                tmp_path = tmp.name
-            
-            try:
-                if await download_tarball(tarball_url, tmp_path):
-                    tarball_findings = scan_tarball(tmp_path)
-            finally:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-        
-        is_popular = package_name in POPULAR_PACKAGES
-        
-        publish_score = calculate_publish_activity_score(
-            publish_data["releases_last_7d"],
-            publish_data["releases_last_30d"],
-            publish_data["is_dormant_then_sudden"],
-            publish_data["latest_age_days"]
-        )
-        
-        maintainer_score = calculate_maintainer_score(
-            maintainer_data["count"],
-            maintainer_data["has_recent_addition"],
-            maintainer_data["has_github_repo"],
-            maintainer_data["has_free_email"]
-        )
-        
-        dependency_score = calculate_dependency_score(
-            dependency_data["count"],
-            dependency_data["deprecated_count"],
-            dependency_data["missing_repo_count"]
-        )
-        
-        typosquat_score = calculate_typosquat_score(min_distance, is_popular)
-        
-        tarball_score = calculate_tarball_score(
-            tarball_findings["has_postinstall"],
-            tarball_findings["has_network_commands"],
-            tarball_findings["has_eval_function"],
-            tarball_findings["has_high_entropy"]
-        )
-        
-        final_score = calculate_final_risk_score(
-            publish_score,
-            maintainer_score,
-            dependency_score,
-            typosquat_score,
-            tarball_score
-        )
-        
-        severity = get_severity(final_score)
-        
-        flags = generate_flags(
-            publish_data,
-            maintainer_data,
-            dependency_data,
-            typosquat_data,
-            tarball_findings
-        )
-        
-        timeline = parse_version_timeline(pkg_info.get("time", {}))
-        
-        tarball_summary = get_tarball_summary(tarball_findings)
-        
-        report = {
-            "package": package_name,
-            "version": pkg_info.get("latest_version", "unknown"),
-            "risk_score": final_score,
-            "severity": severity,
-            "risk_breakdown": {
-                "publish_activity": publish_score,
-                "maintainer": maintainer_score,
-                "dependency": dependency_score,
-                "typosquat": typosquat_score,
-                "tarball_scan": tarball_score
-            },
-            "flags": flags,
-            "evidence": {
-                "maintainers": pkg_info.get("maintainers", []),
-                "latest_release_date": publish_data.get("latest_release_date"),
-                "tarball_findings": tarball_summary,
-                "publish_timeline": timeline[:10],
-                "repository": pkg_info.get("repository"),
-                "dependencies_count": dependency_data["count"],
-                "typosquat_matches": typosquat_matches,
-                "description": pkg_info.get("description", ""),
-                "license": pkg_info.get("license", "unknown"),
-                "homepage": pkg_info.get("homepage", "")
-            },
-            "timestamp": datetime.utcnow().isoformat() + "Z"
-        }
-        
-        return report
+            scanned = await scan_remote_tarball(
+                package_name,
+                pkg_info.get("latest_version", "unknown"),
+                pkg_info
+            )
+            if scanned is not None:
+                tarball_findings = scanned
         
+        return await run_in_worker(build_report, package_name, pkg_info, tarball_findings)
+    
+    except WorkerPoolFull:
+        raise
     except Exception as e:
         return {"error": f"Audit failed: {str(e)}"}
 
 
+def build_report(package_name: str, pkg_info: dict, tarball_findings: dict) -> dict:
+    publish_data = analyze_publish_activity(pkg_info.get("time", {}), pkg_info.get("release_index"))
+    maintainer_data = analyze_maintainers(
+        pkg_info.get("maintainers", []),
+        pkg_info.get("repository")
+    )
+    dependency_data = analyze_dependencies(pkg_info.get("dependencies", {}))
+    
+    min_distance, typosquat_matches = find_typosquat_matches(package_name)
+    confusable_matches = find_confusable_matches(package_name)
+    typosquat_data = {
+        "min_distance": min_distance,
+        "matches": typosquat_matches,
+        "confusables": confusable_matches
+    }
+    
+    is_popular = is_popular_package(package_name)
+    
+    publish_score = calculate_publish_activity_score(
+        publish_data["releases_last_7d"],
+        publish_data["releases_last_30d"],
+        publish_data["is_dormant_then_sudden"],
+        publish_data["latest_age_days"]
+    )
+    
+    maintainer_score = calculate_maintainer_score(
+        maintainer_data["count"],
+        maintainer_data["has_recent_addition"],
+        maintainer_data["has_github_repo"],
+        maintainer_data["has_free_email"]
+    )
+    
+    dependency_score = calculate_dependency_score(
+        dependency_data["count"],
+        dependency_data["deprecated_count"],
+        dependency_data["missing_repo_count"]
+    )
+    
+    typosquat_score = calculate_typosquat_score(min_distance, is_popular, bool(confusable_matches))
+    
+    tarball_score = calculate_tarball_score(
+        tarball_findings["has_postinstall"],
+        tarball_findings["has_network_commands"],
+        tarball_findings["has_eval_function"],
+        tarball_findings["has_high_entropy"],
+        tarball_findings.get("scan_status", {}).get("reasons")
+    )
+    
+    final_score = calculate_final_risk_score(
+        publish_score,
+        maintainer_score,
+        dependency_score,
+        typosquat_score,
+        tarball_score
+    )
+    
+    severity = get_severity(final_score)
+    
+    flags = generate_flags(
+        publish_data,
+        maintainer_data,
+        dependency_data,
+        typosquat_data,
+        tarball_findings
+    )
+    
+    timeline = parse_version_timeline(pkg_info.get("time", {}), pkg_info.get("release_index"))
+    
+    tarball_summary = get_tarball_summary(tarball_findings)
+    
+    report = {
+        "package": package_name,
+        "version": pkg_info.get("latest_version", "unknown"),
+        "risk_score": final_score,
+        "severity": severity,
+        "risk_breakdown": {
+            "publish_activity": publish_score,
+            "maintainer": maintainer_score,
+            "dependency": dependency_score,
+            "typosquat": typosquat_score,
+            "tarball_scan": tarball_score
+        },
+        "flags": flags,
+        "evidence": {
+            "maintainers": pkg_info.get("maintainers", []),
+            "latest_release_date": publish_data.get("latest_release_date"),
+            "publish_cadence": publish_data.get("cadence"),
+            "tarball_findings": tarball_summary,
+            "tarball_scan": tarball_findings.get("scan_status"),
+            "publish_timeline": timeline[:10],
+            "repository": pkg_info.get("repository"),
+            "dependencies_count": dependency_data["count"],
+            "typosquat_matches": typosquat_matches,
+            "confusable_matches": confusable_matches,
+            "description": pkg_info.get("description", ""),
+            "license": pkg_info.get("license", "unknown"),
+            "homepage": pkg_info.get("homepage", "")
+        },
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+    
+    return report
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5000)
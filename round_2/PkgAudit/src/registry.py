@@ -1,172 +1,669 @@
+import asyncio
+import base64
+import hashlib
 import httpx
-import json
+import importlib.util
 import sqlite3
 import os
 import time
+import zlib
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Awaitable, Tuple, Callable
+
+from cache import (
+    AsyncCache,
+    CacheEngine,
+    MemoryCache,
+    CACHE_FORMAT_JSON,
+    CACHE_FORMAT_ZLIB_JSON,
+    encode_payload,
+    decode_payload,
+    serialize_response
+)
+from audit import build_release_index
+from coalesce import coalesce
 
 CACHE_DB = os.path.join(os.path.dirname(__file__), "cache.db")
 CACHE_TTL_SECONDS = 24 * 60 * 60
+FILE_FINDINGS_TTL_SECONDS = 30 * 24 * 60 * 60
+TARBALL_FINDINGS_TTL_SECONDS = float("inf")
+CACHE_COMPRESS = True
+CACHE_TRIM_PACKUMENTS = True
 
+RELEASE_INDEX_FIELD = "release_index"
+PACKUMENT_FIELDS = [
+    "name", "description", "dist-tags", "time", "maintainers", "repository", "homepage", "modified",
+    RELEASE_INDEX_FIELD
+]
 
-def init_cache():
-    conn = sqlite3.connect(CACHE_DB)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS registry_cache (
-            package_name TEXT PRIMARY KEY,
-            data TEXT,
-            cached_at REAL
+REGISTRY_URL = "https://registry.npmjs.org"
+ABBREVIATED_ACCEPT = "application/vnd.npm.install-v1+json; q=1.0, application/json; q=0.8, */*"
+
+ABBREVIATED_FIELDS = [
+    "name", "latest_version", "versions", "dependencies", "dev_dependencies",
+    "tarball_url", "integrity", "shasum", "has_install_script", "deprecated"
+]
+FULL_FIELDS = ABBREVIATED_FIELDS + [
+    "time", "release_index", "maintainers", "repository", "scripts", "description", "license", "homepage"
+]
+
+REGISTRY_TIMEOUT_SECONDS = 30.0
+TARBALL_TIMEOUT_SECONDS = 60.0
+TARBALL_MAX_BYTES = 50 * 1024 * 1024
+TARBALL_CHUNK_SIZE = 64 * 1024
+INTEGRITY_ALGORITHMS = ["sha512", "sha384", "sha256", "sha1"]
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_MAX_CONNECTIONS_PER_HOST = 10
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 30.0
+
+
+class TarballRejected(ValueError):
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+_cache_engine: Optional[CacheEngine] = None
+_async_cache: Optional[AsyncCache] = None
+_report_memory_cache = MemoryCache()
+_http_client: Optional[httpx.AsyncClient] = None
+_host_limit = HTTP_MAX_CONNECTIONS_PER_HOST
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+_http_stats = {
+    "requests": 0,
+    "new_connections": 0,
+    "not_modified": 0,
+    "tarballs_rejected": 0,
+    "http2": False
+}
+
+
+async def start_http_client(
+    max_connections: int = HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    max_connections_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST,
+    keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    http2: bool = False
+) -> httpx.AsyncClient:
+    global _http_client, _host_limit
+    
+    if _http_client is not None:
+        return _http_client
+    
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+    
+    _host_limit = max_connections_per_host
+    _host_semaphores.clear()
+    _http_stats.update({
+        "requests": 0,
+        "new_connections": 0,
+        "not_modified": 0,
+        "tarballs_rejected": 0,
+        "http2": http2
+    })
+    
+    _http_client = httpx.AsyncClient(
+        timeout=REGISTRY_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
         )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS report_cache (
-            package_name TEXT PRIMARY KEY,
-            report TEXT,
-            cached_at REAL
+    )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    _host_semaphores.clear()
+
+
+def get_http_stats() -> Dict[str, Any]:
+    requests = _http_stats["requests"]
+    new_connections = _http_stats["new_connections"]
+    return {
+        "active": _http_client is not None,
+        "http2": _http_stats["http2"],
+        "requests": requests,
+        "new_connections": new_connections,
+        "reused_connections": max(requests - new_connections, 0),
+        "not_modified": _http_stats["not_modified"],
+        "tarballs_rejected": _http_stats["tarballs_rejected"],
+        "max_connections_per_host": _host_limit
+    }
+
+
+async def _trace_connection(event_name: str, info: Dict[str, Any]):
+    if event_name == "connection.connect_tcp.complete":
+        _http_stats["new_connections"] += 1
+
+
+@asynccontextmanager
+async def _client_session(timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    if _http_client is not None:
+        yield _http_client
+        return
+    
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+        yield client
+
+
+async def _http_get(
+    client: httpx.AsyncClient,
+    url: str,
+    timeout: float,
+    headers: Optional[Dict[str, str]] = None
+) -> httpx.Response:
+    async with _host_semaphore(url):
+        _http_stats["requests"] += 1
+        return await client.get(
+            url,
+            headers=headers,
+            timeout=timeout,
+            extensions={"trace": _trace_connection}
         )
-    """)
-    conn.commit()
-    conn.close()
 
 
-def get_cached_registry(package_name: str) -> Optional[Dict[str, Any]]:
+@asynccontextmanager
+async def _http_stream(client: httpx.AsyncClient, url: str, timeout: float) -> AsyncIterator[httpx.Response]:
+    async with _host_semaphore(url):
+        _http_stats["requests"] += 1
+        async with client.stream(
+            "GET",
+            url,
+            timeout=timeout,
+            extensions={"trace": _trace_connection}
+        ) as response:
+            yield response
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = httpx.URL(url).host
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_host_limit)
+        _host_semaphores[host] = semaphore
+    return semaphore
+
+
+def _registry_table(abbreviated: bool) -> str:
+    return "abbreviated_cache" if abbreviated else "registry_cache"
+
+
+def get_cache_engine() -> CacheEngine:
+    global _cache_engine
+    
+    if _cache_engine is None:
+        _cache_engine = CacheEngine(CACHE_DB)
+    return _cache_engine
+
+
+def get_async_cache() -> AsyncCache:
+    global _async_cache
+    
+    engine = get_cache_engine()
+    if _async_cache is None or _async_cache.engine is not engine:
+        if _async_cache is not None:
+            _async_cache.close()
+        _async_cache = AsyncCache(engine)
+    return _async_cache
+
+
+def close_cache_engine():
+    global _cache_engine, _async_cache
+    
+    if _async_cache is not None:
+        _async_cache.close()
+        _async_cache = None
+    if _cache_engine is not None:
+        _cache_engine.close()
+        _cache_engine = None
+    _report_memory_cache.clear()
+
+
+async def get_cache_stats() -> Dict[str, Any]:
+    engine = get_cache_engine()
+    stats = engine.stats()
+    stats["async"] = get_async_cache().stats()
+    stats["memory"] = _report_memory_cache.stats()
+    stats["storage"] = await get_async_cache().read(engine.storage_stats)
+    return stats
+
+
+def init_cache():
+    get_cache_engine().initialize()
+
+
+def with_release_index(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    if "error" in metadata or "time" not in metadata:
+        return metadata
+    return {**metadata, RELEASE_INDEX_FIELD: build_release_index(metadata["time"])}
+
+
+def trim_packument(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    if "error" in metadata:
+        return metadata
+    
+    latest_version = metadata.get("dist-tags", {}).get("latest")
+    trimmed = {field: metadata[field] for field in PACKUMENT_FIELDS if field in metadata}
+    trimmed["versions"] = {
+        version: (data if version == latest_version else {})
+        for version, data in metadata.get("versions", {}).items()
+    }
+    return trimmed
+
+
+def _load_registry(package_name: str, abbreviated: bool) -> Optional[Dict[str, Any]]:
+    row = get_cache_engine().get_fresh(
+        _registry_table(abbreviated), package_name, ["data", "format"], CACHE_TTL_SECONDS
+    )
+    return decode_payload(row["data"], row["format"]) if row else None
+
+
+def _load_registry_validators(package_name: str, abbreviated: bool) -> Optional[Dict[str, Any]]:
+    row = get_cache_engine().get(
+        _registry_table(abbreviated), package_name, ["data", "format", "etag", "last_modified"]
+    )
+    if row and (row["etag"] or row["last_modified"]):
+        return {
+            "data": decode_payload(row["data"], row["format"]),
+            "etag": row["etag"],
+            "last_modified": row["last_modified"]
+        }
+    return None
+
+
+def _load_report_entry(package_name: str) -> Optional[Tuple[Dict[str, Any], bytes, float]]:
+    row = get_cache_engine().get_fresh(
+        "report_cache", package_name, ["report", "format"], CACHE_TTL_SECONDS
+    )
+    if not row:
+        return None
+    report = decode_payload(row["report"], row["format"])
+    return report, serialize_response(report), row["cached_at"] + CACHE_TTL_SECONDS
+
+
+def _load_findings(table: str, key: str, ruleset: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+    row = get_cache_engine().get_fresh(table, key, ["findings", "format", "ruleset"], ttl_seconds)
+    if not row or row["ruleset"] != ruleset:
+        return None
+    return decode_payload(row["findings"], row["format"])
+
+
+def _registry_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    if CACHE_TRIM_PACKUMENTS:
+        data = trim_packument(data)
+    stored, format, raw_size = encode_payload(data, CACHE_COMPRESS)
+    return {"data": stored, "format": format, "raw_size": raw_size}
+
+
+def _report_row(report: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+    stored, format, raw_size = encode_payload(report, CACHE_COMPRESS)
+    return {"report": stored, "format": format, "raw_size": raw_size}, serialize_response(report)
+
+
+def _findings_row(findings: Dict[str, Any], ruleset: str, now: float) -> Dict[str, Any]:
+    payload, format, raw_size = encode_payload(findings, CACHE_COMPRESS)
+    return {"findings": payload, "ruleset": ruleset, "cached_at": now, "format": format, "raw_size": raw_size}
+
+
+def get_cached_file_findings(digest: str, ruleset: str) -> Optional[Dict[str, Any]]:
+    return _load_findings("file_findings_cache", digest, ruleset, FILE_FINDINGS_TTL_SECONDS)
+
+
+def set_cached_file_findings(entries: List[Tuple[str, Dict[str, Any]]], ruleset: str):
+    now = time.time()
+    rows = [(digest, _findings_row(findings, ruleset, now)) for digest, findings in entries]
+    get_cache_engine().put_many("file_findings_cache", rows)
+
+
+def tarball_cache_key(integrity: Optional[str], shasum: Optional[str]) -> Optional[str]:
+    strongest = _strongest_integrity(integrity)
+    if strongest is not None:
+        return "-".join(strongest)
+    if shasum:
+        return f"shasum-{shasum.lower()}"
+    return None
+
+
+def migrate_cache(trim: bool = CACHE_TRIM_PACKUMENTS, compress: bool = CACHE_COMPRESS) -> Dict[str, Any]:
+    engine = get_cache_engine()
+    before = engine.storage_stats()
+    target_format = CACHE_FORMAT_ZLIB_JSON if compress else CACHE_FORMAT_JSON
+    
+    def reencoder(trim_payload: bool):
+        def reencode(stored, format):
+            try:
+                value = decode_payload(stored, format)
+            except (ValueError, zlib.error):
+                return None
+            if trim_payload:
+                value = trim_packument(value)
+            return encode_payload(value, compress)
+        return reencode
+    
+    rewritten = {}
+    for table in (_registry_table(False), _registry_table(True)):
+        rewritten[table] = engine.rewrite_payloads(table, reencoder(trim), target_format)
+    rewritten["report_cache"] = engine.rewrite_payloads("report_cache", reencoder(False), target_format)
+    for table in ("file_findings_cache", "tarball_cache"):
+        rewritten[table] = engine.rewrite_payloads(table, reencoder(False), target_format)
+    engine.vacuum()
+    
+    after = engine.storage_stats()
+    return {
+        "rewritten": rewritten,
+        "db_bytes_before": before["db_bytes"] + before["wal_bytes"],
+        "db_bytes_after": after["db_bytes"] + after["wal_bytes"],
+        "tables": after["tables"]
+    }
+
+
+async def get_cached_registry(package_name: str, abbreviated: bool = False) -> Optional[Dict[str, Any]]:
     try:
-        conn = sqlite3.connect(CACHE_DB)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT data, cached_at FROM registry_cache WHERE package_name = ?",
-            (package_name,)
-        )
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            data, cached_at = row
-            if time.time() - cached_at < CACHE_TTL_SECONDS:
-                return json.loads(data)
-    except:
-        pass
+        return await get_async_cache().read(_load_registry, package_name, abbreviated)
+    except (sqlite3.Error, ValueError, zlib.error) as e:
+        print(f"Cache read error for {package_name}: {e}")
     return None
 
 
-def set_cached_registry(package_name: str, data: Dict[str, Any]):
+async def get_registry_validators(package_name: str, abbreviated: bool = False) -> Optional[Dict[str, Any]]:
     try:
-        conn = sqlite3.connect(CACHE_DB)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO registry_cache (package_name, data, cached_at) VALUES (?, ?, ?)",
-            (package_name, json.dumps(data), time.time())
-        )
-        conn.commit()
-        conn.close()
-    except:
-        pass
+        return await get_async_cache().read(_load_registry_validators, package_name, abbreviated)
+    except (sqlite3.Error, ValueError, zlib.error) as e:
+        print(f"Cache read error for {package_name}: {e}")
+    return None
+
+
+async def set_cached_registry(
+    package_name: str,
+    data: Dict[str, Any],
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    abbreviated: bool = False
+):
+    cache = get_async_cache()
+    row = await cache.run(_registry_row, data)
+    
+    try:
+        await cache.put(_registry_table(abbreviated), package_name, {
+            **row,
+            "cached_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified
+        })
+    except sqlite3.Error as e:
+        print(f"Cache write error for {package_name}: {e}")
+
+
+async def touch_cached_registry(package_name: str, abbreviated: bool = False):
+    try:
+        await get_async_cache().update(_registry_table(abbreviated), package_name, {"cached_at": time.time()})
+    except sqlite3.Error as e:
+        print(f"Cache write error for {package_name}: {e}")
 
 
-def get_cached_report(package_name: str) -> Optional[Dict[str, Any]]:
+async def _get_report_entry(package_name: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    entry = _report_memory_cache.get(package_name)
+    if entry is not None:
+        return entry
+    
     try:
-        conn = sqlite3.connect(CACHE_DB)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT report, cached_at FROM report_cache WHERE package_name = ?",
-            (package_name,)
+        loaded = await get_async_cache().read(_load_report_entry, package_name)
+    except (sqlite3.Error, ValueError, zlib.error) as e:
+        print(f"Cache read error for {package_name}: {e}")
+        return None
+    
+    if loaded is None:
+        return None
+    report, body, expires_at = loaded
+    _report_memory_cache.put(package_name, report, body, expires_at)
+    return report, body
+
+
+async def get_cached_report(package_name: str) -> Optional[Dict[str, Any]]:
+    entry = await _get_report_entry(package_name)
+    return entry[0] if entry else None
+
+
+async def get_cached_report_body(package_name: str) -> Optional[bytes]:
+    entry = await _get_report_entry(package_name)
+    return entry[1] if entry else None
+
+
+async def set_cached_report(package_name: str, report: Dict[str, Any]):
+    _report_memory_cache.invalidate(package_name)
+    cache = get_async_cache()
+    row, body = await cache.run(_report_row, report)
+    
+    try:
+        await cache.put("report_cache", package_name, {**row, "cached_at": time.time()})
+    except sqlite3.Error as e:
+        print(f"Cache write error for {package_name}: {e}")
+        return
+    
+    _report_memory_cache.put(package_name, report, body, time.time() + CACHE_TTL_SECONDS)
+
+
+async def get_cached_tarball_findings(cache_key: str, ruleset: str) -> Optional[Dict[str, Any]]:
+    try:
+        return await get_async_cache().read(
+            _load_findings, "tarball_cache", cache_key, ruleset, TARBALL_FINDINGS_TTL_SECONDS
         )
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            report, cached_at = row
-            if time.time() - cached_at < CACHE_TTL_SECONDS:
-                return json.loads(report)
-    except:
-        pass
+    except (sqlite3.Error, ValueError, zlib.error) as e:
+        print(f"Cache read error for tarball {cache_key}: {e}")
     return None
 
 
-def set_cached_report(package_name: str, report: Dict[str, Any]):
+async def set_cached_tarball_findings(cache_key: str, ruleset: str, findings: Dict[str, Any]):
+    cache = get_async_cache()
+    row = await cache.run(_findings_row, findings, ruleset, time.time())
     try:
-        conn = sqlite3.connect(CACHE_DB)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO report_cache (package_name, report, cached_at) VALUES (?, ?, ?)",
-            (package_name, json.dumps(report), time.time())
-        )
-        conn.commit()
-        conn.close()
-    except:
-        pass
+        await cache.put("tarball_cache", cache_key, row)
+    except sqlite3.Error as e:
+        print(f"Cache write error for tarball {cache_key}: {e}")
 
 
-async def fetch_package_metadata(package_name: str) -> Dict[str, Any]:
-    init_cache()
-    
-    cached = get_cached_registry(package_name)
+async def fetch_package_metadata(package_name: str, abbreviated: bool = False) -> Dict[str, Any]:
+    cached = await get_cached_registry(package_name, abbreviated=abbreviated)
     if cached:
         return cached
     
-    url = f"https://registry.npmjs.org/{package_name}"
+    mode = "abbreviated" if abbreviated else "full"
+    return await coalesce(
+        "metadata",
+        f"{mode}:{package_name}",
+        lambda: _download_package_metadata(package_name, abbreviated)
+    )
+
+
+async def _download_package_metadata(package_name: str, abbreviated: bool) -> Dict[str, Any]:
+    url = f"{REGISTRY_URL}/{package_name}"
+    
+    stale = await get_registry_validators(package_name, abbreviated=abbreviated)
+    headers = {}
+    if abbreviated:
+        headers["Accept"] = ABBREVIATED_ACCEPT
+    if stale:
+        if stale["etag"]:
+            headers["If-None-Match"] = stale["etag"]
+        if stale["last_modified"]:
+            headers["If-Modified-Since"] = stale["last_modified"]
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(url)
+    async with _client_session(REGISTRY_TIMEOUT_SECONDS) as client:
+        response = await _http_get(client, url, REGISTRY_TIMEOUT_SECONDS, headers=headers)
+        
+        if response.status_code == 304 and stale:
+            _http_stats["not_modified"] += 1
+            await touch_cached_registry(package_name, abbreviated=abbreviated)
+            return stale["data"]
         
         if response.status_code == 404:
             return {"error": "Package not found", "status": 404}
         
         response.raise_for_status()
         data = response.json()
+        if not abbreviated:
+            data = await get_async_cache().run(with_release_index, data)
         
-        set_cached_registry(package_name, data)
+        await set_cached_registry(
+            package_name,
+            data,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            abbreviated=abbreviated
+        )
         return data
 
 
-def extract_package_info(metadata: Dict[str, Any]) -> Dict[str, Any]:
+def extract_package_info(metadata: Dict[str, Any], abbreviated: bool = False) -> Dict[str, Any]:
     if "error" in metadata:
         return metadata
     
     latest_version = metadata.get("dist-tags", {}).get("latest", "unknown")
     versions = metadata.get("versions", {})
-    time_data = metadata.get("time", {})
-    maintainers = metadata.get("maintainers", [])
     
     latest_data = versions.get(latest_version, {})
-    repository = latest_data.get("repository") or metadata.get("repository")
     dependencies = latest_data.get("dependencies", {})
     dev_dependencies = latest_data.get("devDependencies", {})
     dist = latest_data.get("dist", {})
     tarball_url = dist.get("tarball", "")
+    integrity = dist.get("integrity")
+    shasum = dist.get("shasum")
     scripts = latest_data.get("scripts", {})
+    has_install_script = latest_data.get("hasInstallScript", False) or any(
+        name in scripts for name in ("preinstall", "install", "postinstall")
+    )
     
-    return {
+    info = {
+        "mode": "abbreviated" if abbreviated else "full",
         "name": metadata.get("name", ""),
         "latest_version": latest_version,
         "versions": list(versions.keys()),
-        "time": time_data,
-        "maintainers": maintainers,
-        "repository": repository,
         "dependencies": dependencies,
         "dev_dependencies": dev_dependencies,
         "tarball_url": tarball_url,
+        "integrity": integrity,
+        "shasum": shasum,
+        "has_install_script": has_install_script,
+        "deprecated": latest_data.get("deprecated")
+    }
+    
+    if info["mode"] == "abbreviated":
+        return info
+    
+    time_data = metadata.get("time", {})
+    maintainers = metadata.get("maintainers", [])
+    repository = latest_data.get("repository") or metadata.get("repository")
+    
+    info.update({
+        "time": time_data,
+        "release_index": metadata.get(RELEASE_INDEX_FIELD) or build_release_index(time_data),
+        "maintainers": maintainers,
+        "repository": repository,
         "scripts": scripts,
         "description": metadata.get("description", ""),
         "license": latest_data.get("license", "unknown"),
         "homepage": metadata.get("homepage", "")
-    }
+    })
+    return info
+
+
+def _strongest_integrity(integrity: Optional[str]) -> Optional[Tuple[str, str]]:
+    expected = {}
+    for entry in (integrity or "").split():
+        algorithm, _, digest = entry.partition("-")
+        expected[algorithm.lower()] = digest.split("?")[0]
+    
+    for algorithm in INTEGRITY_ALGORITHMS:
+        if expected.get(algorithm):
+            return algorithm, expected[algorithm]
+    return None
+
+
+def integrity_verifier(
+    integrity: Optional[str],
+    shasum: Optional[str]
+) -> Tuple[Optional[Any], Optional[Callable[[Any], bool]]]:
+    strongest = _strongest_integrity(integrity)
+    if strongest is not None:
+        algorithm, digest = strongest
+        return hashlib.new(algorithm), lambda h: base64.b64encode(h.digest()).decode() == digest
+    
+    if shasum:
+        return hashlib.sha1(), lambda h: h.hexdigest() == shasum.lower()
+    return None, None
 
 
-async def download_tarball(tarball_url: str, dest_path: str) -> bool:
+async def stream_tarball(
+    tarball_url: str,
+    sink: Callable[[bytes], Awaitable[None]],
+    integrity: Optional[str] = None,
+    shasum: Optional[str] = None,
+    max_bytes: Optional[int] = TARBALL_MAX_BYTES,
+    reasons: Optional[List[str]] = None
+) -> bool:
     if not tarball_url:
         return False
     
+    hasher, verify = integrity_verifier(integrity, shasum)
+    
     try:
-        async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
-            response = await client.get(tarball_url)
-            response.raise_for_status()
-            
-            with open(dest_path, "wb") as f:
-                f.write(response.content)
-            return True
+        async with _client_session(TARBALL_TIMEOUT_SECONDS) as client:
+            async with _http_stream(client, tarball_url, TARBALL_TIMEOUT_SECONDS) as response:
+                response.raise_for_status()
+                
+                declared = int(response.headers.get("content-length") or 0)
+                if max_bytes and declared > max_bytes:
+                    raise TarballRejected("too_large", f"tarball is {declared} bytes, limit is {max_bytes}")
+                
+                received = 0
+                async for chunk in response.aiter_bytes(TARBALL_CHUNK_SIZE):
+                    received += len(chunk)
+                    if max_bytes and received > max_bytes:
+                        raise TarballRejected("too_large", f"tarball exceeds {max_bytes} bytes")
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    await sink(chunk)
+        
+        if verify is not None and not verify(hasher):
+            raise TarballRejected("integrity_mismatch", "tarball does not match dist.integrity/shasum")
+        return True
     except Exception as e:
+        if isinstance(e, ValueError):
+            _http_stats["tarballs_rejected"] += 1
+        if reasons is not None:
+            reasons.append(e.reason if isinstance(e, TarballRejected) else "download_error")
         print(f"Error downloading tarball: {e}")
         return False
+
+
+async def download_tarball(
+    tarball_url: str,
+    dest_path: str,
+    integrity: Optional[str] = None,
+    shasum: Optional[str] = None,
+    max_bytes: Optional[int] = TARBALL_MAX_BYTES
+) -> bool:
+    if not tarball_url:
+        return False
+    
+    with open(dest_path, "wb") as f:
+        async def write(chunk: bytes):
+            f.write(chunk)
+        
+        ok = await stream_tarball(tarball_url, write, integrity, shasum, max_bytes)
+    
+    if not ok and os.path.exists(dest_path):
+        os.unlink(dest_path)
+    return ok
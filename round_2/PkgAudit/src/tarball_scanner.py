@@ -1,12 +1,31 @@
 import os
 import json
+import hashlib
+import queue
+import sqlite3
+import zlib
 import tarfile
 import tempfile
+import threading
+import asyncio
 import re
 import shutil
-from typing import Dict, Any, List, Tuple
+import time
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple, IO, Optional
 
-from audit import calculate_entropy
+from audit import calculate_entropies, calculate_tarball_score, TARBALL_REJECTION_FLAGS
+from registry import (
+    stream_tarball,
+    tarball_cache_key,
+    get_cached_file_findings,
+    set_cached_file_findings,
+    get_cached_tarball_findings,
+    set_cached_tarball_findings
+)
+from workers import submit_stream_scan
 
 SUSPICIOUS_TOKENS = [
     r'\beval\s*\(',
@@ -27,24 +46,524 @@ SUSPICIOUS_TOKENS = [
     r'WebSocket',
 ]
 
+STREAM_QUEUE_CHUNKS = 64
+STREAM_POLL_SECONDS = 0.5
+SCAN_POOL_WORKERS = os.cpu_count() or 1
+SCAN_PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+SCAN_BATCH_BYTES = 512 * 1024
+FILE_FINDINGS_CACHE = True
+TARBALL_FINDINGS_CACHE = True
+SCANNER_REVISION = 2
+
+SCAN_POLICY: Dict[str, Any] = {
+    "max_file_bytes": 8 * 1024 * 1024,
+    "max_total_bytes": 64 * 1024 * 1024,
+    "deadline_seconds": 30.0,
+    "max_evidence": 50,
+    "stop_when_saturated": False
+}
+
+EVAL_TOKENS = [p for p in SUSPICIOUS_TOKENS[:3] if "eval" in p.lower() or "function" in p.lower()]
+NETWORK_TOKENS = SUSPICIOUS_TOKENS[3:7]
+HIGH_ENTROPY_PATTERN = r'["\'][A-Za-z0-9+/=]{100,}["\']'
+HEX_ENCODED_PATTERN = r'\\x[0-9a-fA-F]{2}(?:\\x[0-9a-fA-F]{2}){50,}'
+HEX_ENCODED_LITERAL = "\\x"
+SNIPPET_CONTEXT = 50
+
 INSTALL_SCRIPTS = ["postinstall", "preinstall", "install", "prepare", "prepublish"]
+NETWORK_COMMANDS = ["curl", "wget", "nc ", "bash", "sh "]
+ENTROPY_THRESHOLD = 4.0
+FILE_MAX_EVIDENCE = 50
+SOURCE_EXTENSIONS = ('.js', '.ts', '.mjs', '.cjs')
+
+FINDING_FLAGS = ["has_postinstall", "has_network_commands", "has_eval_function", "has_high_entropy"]
+FINDING_LISTS = ["install_scripts", "suspicious_files", "high_entropy_strings", "network_patterns", "eval_patterns"]
+
+
+_scan_pool: Optional[ProcessPoolExecutor] = None
+_scan_pool_workers = 0
+_scan_pool_stats = {"parallel_scans": 0, "inline_scans": 0, "batches": 0, "batch_failures": 0}
+
+
+def start_scan_pool(workers: int = SCAN_POOL_WORKERS) -> Optional[ProcessPoolExecutor]:
+    global _scan_pool, _scan_pool_workers
+    
+    if _scan_pool is not None:
+        return _scan_pool
+    if workers < 2:
+        return None
+    
+    _scan_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    _scan_pool_workers = workers
+    _scan_pool_stats.update({"parallel_scans": 0, "inline_scans": 0, "batches": 0, "batch_failures": 0})
+    return _scan_pool
+
+
+def close_scan_pool():
+    global _scan_pool, _scan_pool_workers
+    
+    if _scan_pool is not None:
+        _scan_pool.shutdown(wait=True, cancel_futures=True)
+        _scan_pool = None
+        _scan_pool_workers = 0
+
+
+def get_scan_pool_stats() -> Dict[str, Any]:
+    return {"active": _scan_pool is not None, "workers": _scan_pool_workers, **_scan_pool_stats}
+
+
+_file_cache_lock = threading.Lock()
+_file_cache_stats = {"hits": 0, "misses": 0, "duplicates": 0, "bytes_skipped": 0, "bytes_scanned": 0}
+
+
+def get_file_cache_stats() -> Dict[str, Any]:
+    with _file_cache_lock:
+        stats = dict(_file_cache_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["ruleset"] = RULESET_VERSION
+    return stats
+
+
+def reset_file_cache_stats():
+    with _file_cache_lock:
+        _file_cache_stats.update({"hits": 0, "misses": 0, "duplicates": 0, "bytes_skipped": 0, "bytes_scanned": 0})
+
 
+def count_file(outcome: str, size: int):
+    with _file_cache_lock:
+        _file_cache_stats[outcome] += 1
+        _file_cache_stats["bytes_scanned" if outcome == "misses" else "bytes_skipped"] += size
 
-def scan_tarball(tarball_path: str) -> Dict[str, Any]:
-    findings = {
-        "has_postinstall": False,
-        "has_network_commands": False,
-        "has_eval_function": False,
-        "has_high_entropy": False,
-        "install_scripts": [],
-        "suspicious_files": [],
-        "high_entropy_strings": [],
-        "network_patterns": [],
-        "eval_patterns": []
+
+def strip_file_paths(findings: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: [{k: v for k, v in entry.items() if k != "file"} for entry in value] if isinstance(value, list) else value
+        for key, value in findings.items()
+    }
+
+
+def with_file_path(findings: Dict[str, Any], relative_path: str) -> Dict[str, Any]:
+    return {
+        key: [{"file": relative_path, **entry} for entry in value] if isinstance(value, list) else value
+        for key, value in findings.items()
     }
+
+
+def load_file_findings(digest: str, relative_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        cached = get_cached_file_findings(digest, RULESET_VERSION)
+    except (sqlite3.Error, ValueError, zlib.error) as e:
+        print(f"File findings cache read error: {e}")
+        return None
+    return with_file_path(cached, relative_path) if cached is not None else None
+
+
+def store_file_findings(slots: List[List[Any]]):
+    entries = [(digest, strip_file_paths(findings)) for _, findings, digest, _ in slots if findings is not None]
+    if not entries:
+        return
+    try:
+        set_cached_file_findings(entries, RULESET_VERSION)
+    except sqlite3.Error as e:
+        print(f"File findings cache write error: {e}")
+
+
+def configure_scan_policy(**overrides) -> Dict[str, Any]:
+    unknown = set(overrides) - set(SCAN_POLICY)
+    if unknown:
+        raise ValueError(f"unknown scan policy settings: {', '.join(sorted(unknown))}")
+    SCAN_POLICY.update(overrides)
+    return dict(SCAN_POLICY)
+
+
+def resolve_scan_policy(policy: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {**SCAN_POLICY, **(policy or {})}
+
+
+def is_saturated(findings: Dict[str, Any]) -> bool:
+    return calculate_tarball_score(*(findings[flag] for flag in FINDING_FLAGS)) >= 100
+
+
+def observe_flags(observed: Dict[str, bool], findings: Dict[str, Any]):
+    for flag in FINDING_FLAGS:
+        observed[flag] = observed[flag] or findings[flag]
+
+
+def finish_scan(findings: Dict[str, Any], policy: Dict[str, Any], reasons: List[str]) -> Dict[str, Any]:
+    dropped = findings.pop("evidence_dropped", {})
+    cap = policy["max_evidence"]
+    if cap is not None:
+        for key in FINDING_LISTS:
+            if len(findings[key]) > cap:
+                dropped[key] = dropped.get(key, 0) + len(findings[key]) - cap
+                del findings[key][cap:]
     
+    findings["scan_status"] = {
+        "partial": bool(reasons),
+        "reasons": reasons,
+        "evidence_dropped": dropped
+    }
+    return findings
+
+
+def reject_scan(findings: Dict[str, Any], rejections: List[str]) -> Dict[str, Any]:
+    status = findings["scan_status"]
+    reasons = rejections + [reason for reason in status["reasons"] if reason != "read_error"]
+    findings["scan_status"] = {**status, "partial": True, "reasons": reasons}
+    return findings
+
+
+def empty_findings() -> Dict[str, Any]:
+    findings: Dict[str, Any] = {flag: False for flag in FINDING_FLAGS}
+    findings.update({key: [] for key in FINDING_LISTS})
+    return findings
+
+
+def count_dropped(findings: Dict[str, Any], key: str, count: int):
+    dropped = findings.setdefault("evidence_dropped", {})
+    dropped[key] = dropped.get(key, 0) + count
+
+
+def append_evidence(findings: Dict[str, Any], key: str, entries: List[Dict[str, Any]], cap: Optional[int]):
+    room = len(entries) if cap is None else max(0, cap - len(findings[key]))
+    findings[key].extend(entries[:room])
+    if len(entries) > room:
+        count_dropped(findings, key, len(entries) - room)
+
+
+def merge_findings(target: Dict[str, Any], source: Dict[str, Any], cap: Optional[int] = None):
+    for flag in FINDING_FLAGS:
+        target[flag] = target[flag] or source[flag]
+    for key in FINDING_LISTS:
+        append_evidence(target, key, source[key], cap)
+    for key, count in source.get("evidence_dropped", {}).items():
+        count_dropped(target, key, count)
+
+
+def scan_tarball(tarball_path: str, in_memory: bool = True, policy: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     if not os.path.exists(tarball_path):
-        return findings
+        return empty_findings()
+    
+    if not in_memory:
+        return scan_extracted_tarball(tarball_path, policy)
+    
+    try:
+        with open(tarball_path, "rb") as f:
+            return scan_tarball_stream(f, policy=policy)
+    except Exception as e:
+        print(f"Error scanning tarball: {e}")
+        return empty_findings()
+
+
+def is_safe_member(member: tarfile.TarInfo) -> bool:
+    return not (member.name.startswith('/') or '..' in member.name)
+
+
+def scan_single_file(relative_path: str, content: str) -> Dict[str, Any]:
+    findings = empty_findings()
+    scan_file_content(content, relative_path, findings)
+    return findings
+
+
+def scan_file_batch(files: List[Tuple[str, str]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    reset_prefilter_stats()
+    results = [scan_single_file(relative_path, content) for relative_path, content in files]
+    return results, get_prefilter_stats()
+
+
+def split_batches(files: List[Tuple[Any, str]], batch_bytes: int) -> List[List[Tuple[Any, str]]]:
+    batches: List[List[Tuple[Any, str]]] = [[]]
+    size = 0
+    for item in files:
+        if batches[-1] and size + len(item[1]) > batch_bytes:
+            batches.append([])
+            size = 0
+        batches[-1].append(item)
+        size += len(item[1])
+    return batches
+
+
+def scan_tarball_stream(
+    fileobj: IO[bytes],
+    use_cache: Optional[bool] = None,
+    policy: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    findings = empty_findings()
+    file_findings = empty_findings()
+    package_json: Optional[Tuple[int, bytes]] = None
+    use_cache = FILE_FINDINGS_CACHE if use_cache is None else use_cache
+    
+    policy = resolve_scan_policy(policy)
+    max_file_bytes = policy["max_file_bytes"]
+    max_total_bytes = policy["max_total_bytes"]
+    max_evidence = policy["max_evidence"]
+    deadline = None if policy["deadline_seconds"] is None else time.monotonic() + policy["deadline_seconds"]
+    reasons: List[str] = []
+    observed = {flag: False for flag in FINDING_FLAGS}
+    bytes_read = 0
+    
+    pool = None if policy["stop_when_saturated"] else _scan_pool
+    batches: List[Tuple[List[Tuple[List[Any], str]], "Future[Tuple[List[Dict[str, Any]], Dict[str, Any]]]"]] = []
+    buffered: List[Tuple[List[Any], str]] = []
+    buffered_bytes = 0
+    slots: List[List[Any]] = []
+    fresh: Dict[str, List[Any]] = {}
+    duplicates: List[Tuple[List[Any], List[Any]]] = []
+    
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+            for member in tar:
+                if deadline is not None and time.monotonic() >= deadline:
+                    reasons.append("deadline")
+                    break
+                if policy["stop_when_saturated"] and is_saturated(observed):
+                    reasons.append("saturated")
+                    break
+                
+                if not member.isfile() or not is_safe_member(member):
+                    continue
+                
+                relative_path = os.path.normpath(member.name)
+                filename = os.path.basename(relative_path)
+                is_package_json = filename == "package.json"
+                if not is_package_json and not filename.endswith(SOURCE_EXTENSIONS):
+                    continue
+                depth = relative_path.count(os.sep)
+                if is_package_json and package_json is not None and depth >= package_json[0]:
+                    continue
+                
+                extracted = tar.extractfile(member)
+                if extracted is None:
+                    continue
+                
+                size = member.size
+                truncated = max_file_bytes is not None and size > max_file_bytes
+                if truncated:
+                    size = max_file_bytes
+                    if "max_file_bytes" not in reasons:
+                        reasons.append("max_file_bytes")
+                if max_total_bytes is not None and bytes_read + size > max_total_bytes:
+                    reasons.append("max_total_bytes")
+                    break
+                bytes_read += size
+                data = extracted.read(size)
+                
+                if is_package_json:
+                    package_json = (depth, data)
+                    package_findings = empty_findings()
+                    scan_package_json(data.decode("utf-8", errors="ignore"), package_findings)
+                    observe_flags(observed, package_findings)
+                    continue
+                
+                slot = [relative_path, None, None, len(data)]
+                slots.append(slot)
+                if use_cache and not truncated:
+                    slot[2] = hashlib.sha256(data).hexdigest()
+                    if slot[2] in fresh:
+                        duplicates.append((slot, fresh[slot[2]]))
+                        count_file("duplicates", len(data))
+                        continue
+                    slot[1] = load_file_findings(slot[2], relative_path)
+                    if slot[1] is not None:
+                        count_file("hits", len(data))
+                        observe_flags(observed, slot[1])
+                        continue
+                    fresh[slot[2]] = slot
+                count_file("misses", len(data))
+                
+                content = data.decode("utf-8", errors="ignore")
+                if pool is None:
+                    slot[1] = scan_single_file(relative_path, content)
+                    observe_flags(observed, slot[1])
+                    continue
+                
+                buffered.append((slot, content))
+                buffered_bytes += len(content)
+                if buffered_bytes >= (SCAN_BATCH_BYTES if batches else SCAN_PARALLEL_MIN_BYTES):
+                    batches.extend(submit_batches(pool, buffered))
+                    buffered, buffered_bytes = [], 0
+    except Exception as e:
+        print(f"Error scanning tarball: {e}")
+        reasons.append("read_error")
+    
+    if batches:
+        if buffered:
+            batches.extend(submit_batches(pool, buffered))
+        collect_batches(batches)
+        _scan_pool_stats["parallel_scans"] += 1
+    elif pool is not None:
+        for slot, content in buffered:
+            slot[1] = scan_single_file(slot[0], content)
+        _scan_pool_stats["inline_scans"] += 1
+    
+    for slot, original in duplicates:
+        if original[1] is not None:
+            slot[1] = with_file_path(strip_file_paths(original[1]), slot[0])
+    if fresh:
+        store_file_findings(list(fresh.values()))
+    for slot in slots:
+        if slot[1] is not None:
+            merge_findings(file_findings, slot[1], max_evidence)
+    
+    if package_json is not None:
+        scan_package_json(package_json[1].decode("utf-8", errors="ignore"), findings)
+    merge_findings(findings, file_findings, max_evidence)
+    return finish_scan(findings, policy, reasons)
+
+
+class TarballStream:
+    def __init__(self, max_chunks: int = STREAM_QUEUE_CHUNKS):
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(max_chunks)
+        self._buffer = bytearray()
+        self._eof = False
+        self._aborted = threading.Event()
+        self._detached = threading.Event()
+    
+    async def feed(self, chunk: bytes):
+        if self._detached.is_set():
+            return
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            await asyncio.to_thread(self._queue.put, chunk)
+    
+    async def finish(self, ok: bool = True):
+        if not ok:
+            self._aborted.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            await asyncio.to_thread(self._put_eof)
+    
+    def _put_eof(self):
+        while not self._detached.is_set():
+            try:
+                self._queue.put(None, timeout=STREAM_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+    
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            if self._aborted.is_set():
+                raise IOError("tarball download aborted")
+            chunk = self._queue.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer.extend(chunk)
+        
+        if self._aborted.is_set():
+            raise IOError("tarball download aborted")
+        size = len(self._buffer) if size < 0 else min(size, len(self._buffer))
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+    
+    def scan(self) -> Dict[str, Any]:
+        try:
+            return scan_tarball_stream(self)
+        finally:
+            self._detached.set()
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+
+async def scan_remote_stream(
+    tarball_url: str,
+    integrity: Optional[str] = None,
+    shasum: Optional[str] = None
+) -> Dict[str, Any]:
+    cache_key = tarball_cache_key(integrity, shasum) if TARBALL_FINDINGS_CACHE else None
+    ruleset = tarball_ruleset()
+    if cache_key is not None:
+        cached = await get_cached_tarball_findings(cache_key, ruleset)
+        if cached is not None:
+            return cached
+    
+    stream = TarballStream()
+    scan = submit_stream_scan(stream.scan)
+    
+    ok = False
+    rejections: List[str] = []
+    try:
+        ok = await stream_tarball(tarball_url, stream.feed, integrity=integrity, shasum=shasum, reasons=rejections)
+    finally:
+        await stream.finish(ok)
+    
+    findings = await scan
+    if not ok:
+        return reject_scan(findings, rejections or ["download_error"])
+    
+    if cache_key is not None and not findings["scan_status"]["partial"]:
+        await set_cached_tarball_findings(cache_key, ruleset, findings)
+    return findings
+
+
+def submit_batches(pool: ProcessPoolExecutor, files: List[Tuple[List[Any], str]]):
+    submitted = []
+    for batch in split_batches(files, SCAN_BATCH_BYTES):
+        try:
+            future = pool.submit(scan_file_batch, [(slot[0], content) for slot, content in batch])
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+        submitted.append((batch, future))
+        _scan_pool_stats["batches"] += 1
+    return submitted
+
+
+def collect_batches(batches):
+    error = None
+    for batch, future in batches:
+        try:
+            results, prefilter = future.result()
+        except Exception as e:
+            error = error or e
+            _scan_pool_stats["batch_failures"] += 1
+            for slot, content in batch:
+                slot[1] = scan_single_file(slot[0], content)
+            continue
+        merge_prefilter_stats(prefilter)
+        for (slot, _), result in zip(batch, results):
+            slot[1] = result
+    
+    if error is not None:
+        print(f"Error in scan worker, scanned affected batches inline: {error}")
+
+
+def scan_package_json(content: str, findings: Dict[str, Any]):
+    try:
+        pkg_data = json.loads(content)
+        scripts = pkg_data.get("scripts", {})
+        
+        for script_name in INSTALL_SCRIPTS:
+            if script_name in scripts:
+                findings["has_postinstall"] = True
+                script_content = scripts[script_name]
+                findings["install_scripts"].append({
+                    "name": script_name,
+                    "content": script_content[:500]
+                })
+                
+                if any(cmd in script_content.lower() for cmd in NETWORK_COMMANDS):
+                    findings["has_network_commands"] = True
+                    findings["network_patterns"].append({
+                        "file": "package.json",
+                        "script": script_name,
+                        "snippet": script_content[:200]
+                    })
+    except:
+        pass
+
+
+def scan_extracted_tarball(tarball_path: str, policy: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    findings = empty_findings()
+    policy = resolve_scan_policy(policy)
     
     temp_dir = tempfile.mkdtemp()
     
@@ -52,7 +571,7 @@ def scan_tarball(tarball_path: str) -> Dict[str, Any]:
         with tarfile.open(tarball_path, "r:gz") as tar:
             safe_members = []
             for member in tar.getmembers():
-                if member.name.startswith('/') or '..' in member.name:
+                if not is_safe_member(member):
                     continue
                 safe_members.append(member)
             tar.extractall(temp_dir, members=safe_members)
@@ -64,33 +583,12 @@ def scan_tarball(tarball_path: str) -> Dict[str, Any]:
                 break
         
         if package_json_path:
-            try:
-                with open(package_json_path, "r", encoding="utf-8", errors="ignore") as f:
-                    pkg_data = json.load(f)
-                    scripts = pkg_data.get("scripts", {})
-                    
-                    for script_name in INSTALL_SCRIPTS:
-                        if script_name in scripts:
-                            findings["has_postinstall"] = True
-                            script_content = scripts[script_name]
-                            findings["install_scripts"].append({
-                                "name": script_name,
-                                "content": script_content[:500]
-                            })
-                            
-                            if any(cmd in script_content.lower() for cmd in ["curl", "wget", "nc ", "bash", "sh "]):
-                                findings["has_network_commands"] = True
-                                findings["network_patterns"].append({
-                                    "file": "package.json",
-                                    "script": script_name,
-                                    "snippet": script_content[:200]
-                                })
-            except:
-                pass
+            with open(package_json_path, "r", encoding="utf-8", errors="ignore") as f:
+                scan_package_json(f.read(), findings)
         
         for root, dirs, files in os.walk(temp_dir):
             for filename in files:
-                if not filename.endswith(('.js', '.ts', '.mjs', '.cjs')):
+                if not filename.endswith(SOURCE_EXTENSIONS):
                     continue
                 
                 file_path = os.path.join(root, filename)
@@ -100,8 +598,8 @@ def scan_tarball(tarball_path: str) -> Dict[str, Any]:
                     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
                         content = f.read()
                     
-                    scan_file_content(content, relative_path, findings)
-                    
+                    scan_file_content(content, relative_path, findings, policy["max_evidence"])
+                
                 except Exception as e:
                     continue
     
@@ -111,62 +609,211 @@ def scan_tarball(tarball_path: str) -> Dict[str, Any]:
     finally:
         shutil.rmtree(temp_dir, ignore_errors=True)
     
-    return findings
+    return finish_scan(findings, policy, [])
 
 
-def scan_file_content(content: str, file_path: str, findings: Dict[str, Any]):
-    for pattern in SUSPICIOUS_TOKENS[:3]:
-        matches = re.findall(pattern, content, re.IGNORECASE)
-        if matches:
-            if "eval" in pattern.lower() or "function" in pattern.lower():
-                findings["has_eval_function"] = True
-                snippet = extract_snippet(content, pattern)
-                findings["eval_patterns"].append({
-                    "file": file_path,
-                    "pattern": pattern,
-                    "snippet": snippet
-                })
+def build_rules() -> Dict[str, Tuple[str, str]]:
+    rules: Dict[str, Tuple[str, str]] = {}
+    for prefix, tokens, kind in (("eval", EVAL_TOKENS, "eval_patterns"), ("net", NETWORK_TOKENS, "network_patterns")):
+        for index, pattern in enumerate(tokens):
+            if not pattern.startswith(r'\b'):
+                raise ValueError(f"detector token must start at a word boundary: {pattern}")
+            rules[f"{prefix}{index}"] = (kind, pattern)
+    return rules
+
+
+def required_literal(pattern: str) -> str:
+    words = re.findall(r'[A-Za-z_]{2,}', re.sub(r'\\.', ' ', pattern))
+    return max(words, key=len).casefold()
+
+
+DETECTOR_RULES = build_rules()
+PREFILTER_LITERALS = {name: required_literal(pattern) for name, (_, pattern) in DETECTOR_RULES.items()}
+
+RULESET_VERSION = hashlib.sha256(json.dumps([
+    SCANNER_REVISION,
+    SUSPICIOUS_TOKENS,
+    sorted(DETECTOR_RULES.items()),
+    HIGH_ENTROPY_PATTERN,
+    HEX_ENCODED_PATTERN,
+    SNIPPET_CONTEXT,
+    ENTROPY_THRESHOLD,
+    FILE_MAX_EVIDENCE
+]).encode("utf-8")).hexdigest()[:16]
+
+
+def tarball_ruleset(policy: Optional[Dict[str, Any]] = None) -> str:
+    return hashlib.sha256(json.dumps([
+        RULESET_VERSION,
+        INSTALL_SCRIPTS,
+        NETWORK_COMMANDS,
+        SOURCE_EXTENSIONS,
+        resolve_scan_policy(policy)["max_evidence"]
+    ]).encode("utf-8")).hexdigest()[:16]
+
+
+_prefilter_lock = threading.Lock()
+_prefilter_stats: Dict[str, Any] = {"files": 0, "files_skipped": 0, "rules": {}}
+
+
+def prefilter_rules(content: str) -> Tuple[str, ...]:
+    folded = content.casefold()
+    pending = [name for name, literal in PREFILTER_LITERALS.items() if literal in folded]
+    if HEX_ENCODED_LITERAL in content:
+        pending.append("hex")
     
-    for pattern in SUSPICIOUS_TOKENS[3:7]:
-        matches = re.findall(pattern, content, re.IGNORECASE)
-        if matches:
-            findings["has_network_commands"] = True
-            snippet = extract_snippet(content, pattern)
-            findings["network_patterns"].append({
+    with _prefilter_lock:
+        _prefilter_stats["files"] += 1
+        if not pending:
+            _prefilter_stats["files_skipped"] += 1
+        for name in list(DETECTOR_RULES) + ["hex"]:
+            pattern = DETECTOR_RULES[name][1] if name in DETECTOR_RULES else HEX_ENCODED_PATTERN
+            counters = _prefilter_stats["rules"].setdefault(pattern, {"hits": 0, "skipped": 0})
+            counters["hits" if name in pending else "skipped"] += 1
+    
+    return tuple(pending)
+
+
+def get_prefilter_stats() -> Dict[str, Any]:
+    with _prefilter_lock:
+        return {
+            "files": _prefilter_stats["files"],
+            "files_skipped": _prefilter_stats["files_skipped"],
+            "rules": {pattern: dict(counters) for pattern, counters in _prefilter_stats["rules"].items()}
+        }
+
+
+def merge_prefilter_stats(stats: Dict[str, Any]):
+    with _prefilter_lock:
+        _prefilter_stats["files"] += stats["files"]
+        _prefilter_stats["files_skipped"] += stats["files_skipped"]
+        for pattern, counters in stats["rules"].items():
+            target = _prefilter_stats["rules"].setdefault(pattern, {"hits": 0, "skipped": 0})
+            target["hits"] += counters["hits"]
+            target["skipped"] += counters["skipped"]
+
+
+def reset_prefilter_stats():
+    with _prefilter_lock:
+        _prefilter_stats.update({"files": 0, "files_skipped": 0, "rules": {}})
+
+
+@lru_cache(maxsize=None)
+def detector_matcher(pending: Tuple[str, ...]) -> "re.Pattern[str]":
+    alternatives = []
+    
+    tokens = "|".join(f"(?P<{name}>{DETECTOR_RULES[name][1][2:]})" for name in pending if name in DETECTOR_RULES)
+    if tokens:
+        alternatives.append(f"\\b(?i:{tokens})")
+    
+    alternatives.append(f"(?P<entropy>{HIGH_ENTROPY_PATTERN})")
+    if "hex" in pending:
+        alternatives.append(f"(?P<hex>{HEX_ENCODED_PATTERN})")
+    return re.compile("|".join(alternatives))
+
+
+class LineTracker:
+    def __init__(self, content: str):
+        self.content = content
+        self.offset = 0
+        self.line = 1
+        self.line_start = 0
+    
+    def locate(self, offset: int) -> Tuple[int, int]:
+        newlines = self.content.count("\n", self.offset, offset)
+        if newlines:
+            self.line += newlines
+            self.line_start = self.content.rfind("\n", self.offset, offset) + 1
+        self.offset = offset
+        return self.line, offset - self.line_start + 1
+
+
+def match_location(match: "re.Match[str]", lines: LineTracker) -> Dict[str, Any]:
+    line, column = lines.locate(match.start())
+    return {"offset": match.start(), "line": line, "column": column}
+
+
+def scan_file_content(
+    content: str,
+    file_path: str,
+    findings: Dict[str, Any],
+    max_evidence: Optional[int] = FILE_MAX_EVIDENCE
+):
+    lines = LineTracker(content)
+    first_hits: Dict[str, Dict[str, Any]] = {}
+    entropy_candidates: List[Tuple[str, Dict[str, Any]]] = []
+    hex_hits = []
+    
+    pending = prefilter_rules(content)
+    matcher = detector_matcher(pending)
+    position = 0
+    
+    while True:
+        match = matcher.search(content, position)
+        if match is None:
+            break
+        position = match.end()
+        name = match.lastgroup
+        
+        if name == "entropy":
+            entropy_candidates.append((match.group(), match_location(match, lines)))
+        elif name == "hex":
+            h = match.group()
+            hex_hits.append({
                 "file": file_path,
-                "pattern": pattern,
-                "snippet": snippet
+                "type": "hex_encoded",
+                "length": len(h),
+                "snippet": h[:100] + "..." if len(h) > 100 else h,
+                **match_location(match, lines)
             })
+        else:
+            first_hits[name] = {
+                "file": file_path,
+                "pattern": DETECTOR_RULES[name][1],
+                "snippet": match_snippet(content, match),
+                **match_location(match, lines)
+            }
+            pending = tuple(rule for rule in pending if rule != name)
+            matcher = detector_matcher(pending)
     
-    long_strings = re.findall(r'["\'][A-Za-z0-9+/=]{100,}["\']', content)
-    for s in long_strings:
-        entropy = calculate_entropy(s)
-        if entropy > 4.0:
-            findings["has_high_entropy"] = True
-            findings["high_entropy_strings"].append({
+    entropy_hits = []
+    entropies = calculate_entropies([s for s, _ in entropy_candidates])
+    for (s, location), entropy in zip(entropy_candidates, entropies):
+        if entropy > ENTROPY_THRESHOLD:
+            entropy_hits.append({
                 "file": file_path,
                 "entropy": round(entropy, 2),
                 "length": len(s),
-                "snippet": s[:100] + "..." if len(s) > 100 else s
+                "snippet": s[:100] + "..." if len(s) > 100 else s,
+                **location
             })
     
-    hex_patterns = re.findall(r'\\x[0-9a-fA-F]{2}(?:\\x[0-9a-fA-F]{2}){50,}', content)
-    for h in hex_patterns:
+    for name, (kind, _) in DETECTOR_RULES.items():
+        hit = first_hits.get(name)
+        if hit is None:
+            continue
+        if kind == "eval_patterns":
+            findings["has_eval_function"] = True
+        else:
+            findings["has_network_commands"] = True
+        append_evidence(findings, kind, [hit], max_evidence)
+    
+    if entropy_hits or hex_hits:
         findings["has_high_entropy"] = True
-        findings["high_entropy_strings"].append({
-            "file": file_path,
-            "type": "hex_encoded",
-            "length": len(h),
-            "snippet": h[:100] + "..." if len(h) > 100 else h
-        })
+        append_evidence(findings, "high_entropy_strings", entropy_hits, max_evidence)
+        append_evidence(findings, "high_entropy_strings", hex_hits, max_evidence)
+
+
+def match_snippet(content: str, match: "re.Match[str]") -> str:
+    start = max(0, match.start() - SNIPPET_CONTEXT)
+    end = min(len(content), match.end() + SNIPPET_CONTEXT)
+    return content[start:end]
 
 
 def extract_snippet(content: str, pattern: str) -> str:
     match = re.search(pattern, content, re.IGNORECASE)
     if match:
-        start = max(0, match.start() - 50)
-        end = min(len(content), match.end() + 50)
-        return content[start:end]
+        return match_snippet(content, match)
     return ""
 
 
@@ -186,4 +833,11 @@ def get_tarball_summary(findings: Dict[str, Any]) -> List[str]:
     if findings["has_high_entropy"]:
         summary.append(f"High-entropy strings in {len(findings['high_entropy_strings'])} location(s)")
     
+    scan_status = findings.get("scan_status", {})
+    for reason in scan_status.get("reasons", []):
+        if reason in TARBALL_REJECTION_FLAGS:
+            summary.append(TARBALL_REJECTION_FLAGS[reason])
+    if scan_status.get("partial"):
+        summary.append(f"Tarball scan incomplete ({', '.join(scan_status['reasons'])}); findings may be missing")
+    
     return summary
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+WORKER_THREADS = 4
+WORKER_QUEUE_DEPTH = 16
+STREAM_SCAN_THREADS = 16
+QUEUE_WAIT_SAMPLES = 512
+
+
+class WorkerPoolFull(Exception):
+    pass
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_capacity = 0
+_pending = 0
+_wait_lock = threading.Lock()
+_queue_waits: Deque[float] = deque(maxlen=QUEUE_WAIT_SAMPLES)
+_stats = {"threads": 0, "queue_depth": 0, "submitted": 0, "completed": 0, "rejected": 0}
+_stream_executor: Optional[ThreadPoolExecutor] = None
+_stream_stats = {"threads": 0, "active": 0, "submitted": 0, "rejected": 0}
+
+
+def start_worker_pool(
+    threads: int = WORKER_THREADS,
+    queue_depth: int = WORKER_QUEUE_DEPTH,
+    stream_threads: int = STREAM_SCAN_THREADS
+) -> ThreadPoolExecutor:
+    global _executor, _capacity, _pending, _stream_executor
+    
+    if _executor is not None:
+        return _executor
+    
+    _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="pkgaudit-worker")
+    _stream_executor = ThreadPoolExecutor(max_workers=stream_threads, thread_name_prefix="pkgaudit-stream")
+    _stream_stats.update({"threads": stream_threads, "active": 0, "submitted": 0, "rejected": 0})
+    _capacity = threads + queue_depth
+    _pending = 0
+    _queue_waits.clear()
+    _stats.update({"threads": threads, "queue_depth": queue_depth, "submitted": 0, "completed": 0, "rejected": 0})
+    return _executor
+
+
+def close_worker_pool():
+    global _executor, _stream_executor
+    
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+    if _stream_executor is not None:
+        _stream_executor.shutdown(wait=True, cancel_futures=True)
+        _stream_executor = None
+
+
+def submit_to_worker(func: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+    global _pending
+    
+    loop = asyncio.get_running_loop()
+    if _executor is None:
+        return loop.run_in_executor(None, func, *args)
+    
+    if _pending >= _capacity:
+        _stats["rejected"] += 1
+        raise WorkerPoolFull(f"worker queue is full ({_pending} jobs pending)")
+    
+    _pending += 1
+    _stats["submitted"] += 1
+    queued_at = time.perf_counter()
+    
+    def job():
+        with _wait_lock:
+            _queue_waits.append((time.perf_counter() - queued_at) * 1000)
+        return func(*args)
+    
+    future = loop.run_in_executor(_executor, job)
+    future.add_done_callback(_release)
+    return future
+
+
+def _release(_):
+    global _pending
+    
+    _pending -= 1
+    _stats["completed"] += 1
+
+
+def submit_stream_scan(func: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+    loop = asyncio.get_running_loop()
+    if _stream_executor is None:
+        return loop.run_in_executor(None, func, *args)
+    
+    if _stream_stats["active"] >= _stream_stats["threads"]:
+        _stream_stats["rejected"] += 1
+        raise WorkerPoolFull(f"all {_stream_stats['threads']} stream scan threads are busy")
+    
+    _stream_stats["active"] += 1
+    _stream_stats["submitted"] += 1
+    future = loop.run_in_executor(_stream_executor, func, *args)
+    future.add_done_callback(_release_stream)
+    return future
+
+
+def _release_stream(_):
+    _stream_stats["active"] -= 1
+
+
+async def run_in_worker(func: Callable[..., Any], *args: Any) -> Any:
+    return await submit_to_worker(func, *args)
+
+
+def get_worker_stats() -> Dict[str, Any]:
+    with _wait_lock:
+        waits = sorted(_queue_waits)
+    
+    return {
+        "active": _executor is not None,
+        **_stats,
+        "pending": _pending,
+        "queued": max(0, _pending - _stats["threads"]),
+        "queue_wait_ms": {
+            "avg": round(sum(waits) / len(waits), 2) if waits else 0.0,
+            "p95": round(waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0.0,
+            "max": round(waits[-1], 2) if waits else 0.0
+        },
+        "stream_scans": dict(_stream_stats)
+    }
@@ -1,13 +1,22 @@
 import pytest
 import sys
 import os
+from hypothesis import given, strategies as st
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from audit import (
     levenshtein_distance,
+    bounded_levenshtein,
+    bounded_levenshtein_many,
+    bounded_levenshtein_pairs,
     calculate_entropy,
+    calculate_entropies,
     find_typosquat_matches,
+    find_confusable_matches,
+    find_typosquat_matches_many,
+    is_popular_package,
+    canonical_name,
     is_free_email,
     calculate_publish_activity_score,
     calculate_maintainer_score,
@@ -16,6 +25,8 @@ from audit import (
     calculate_tarball_score,
     calculate_final_risk_score,
     get_severity,
+    load_popular_packages,
+    TyposquatIndex,
     POPULAR_PACKAGES
 )
 
@@ -48,6 +59,35 @@ class TestLevenshteinDistance:
         assert levenshtein_distance("reakt", "react") == 1
 
 
+names = st.text(alphabet="abcé-.", max_size=12)
+
+
+class TestBoundedLevenshtein:
+    def test_rejects_on_length_difference(self):
+        assert bounded_levenshtein("a", "abcdef", 2) == 3
+        assert bounded_levenshtein("", "abc", 2) == 3
+        assert bounded_levenshtein("", "ab", 2) == 2
+    
+    def test_exceeding_bound_returns_bound_plus_one(self):
+        assert bounded_levenshtein("kitten", "sitting", 2) == 3
+        assert bounded_levenshtein("kitten", "sitting", 3) == 3
+        assert bounded_levenshtein("lodahs", "lodash", 2) == 2
+    
+    @given(names, names, st.integers(min_value=0, max_value=4))
+    def test_matches_full_distance_within_bound(self, s1, s2, max_distance):
+        assert bounded_levenshtein(s1, s2, max_distance) == min(levenshtein_distance(s1, s2), max_distance + 1)
+    
+    @given(names, st.lists(names, max_size=40), st.integers(min_value=0, max_value=4))
+    def test_batch_matches_single(self, name, candidates, max_distance):
+        expected = [bounded_levenshtein(name, candidate, max_distance) for candidate in candidates]
+        assert bounded_levenshtein_many(name, candidates, max_distance, min_batch=0) == expected
+    
+    @given(st.lists(st.tuples(names, names), max_size=40), st.integers(min_value=0, max_value=4))
+    def test_pairs_match_single(self, pairs, max_distance):
+        expected = [bounded_levenshtein(s1, s2, max_distance) for s1, s2 in pairs]
+        assert bounded_levenshtein_pairs(pairs, max_distance, min_batch=0) == expected
+
+
 class TestEntropy:
     def test_empty_string(self):
         assert calculate_entropy("") == 0.0
@@ -68,6 +108,21 @@ class TestEntropy:
         base64_str = "SGVsbG8gV29ybGQhIFRoaXMgaXMgYSB0ZXN0IHN0cmluZyB3aXRoIGhpZ2ggZW50cm9weQ=="
         entropy = calculate_entropy(base64_str)
         assert entropy > 3.5
+    
+    def test_batch_matches_single(self):
+        strings = [
+            "", "a", "aaaaaaa", "abababab",
+            "aB1cD2eF3gH4iJ5kL6mN7oP8qR9sT0",
+            "SGVsbG8gV29ybGQhIFRoaXMgaXMgYSB0ZXN0IHN0cmluZyB3aXRoIGhpZ2ggZW50cm9weQ==",
+            "caf\u00e9-\u00ff\u00fe", "\u65e5\u672c\u8a9e\u30c6\u30ad\u30b9\u30c8"
+        ]
+        assert calculate_entropies(strings) == [calculate_entropy(s) for s in strings]
+    
+    def test_batch_without_numpy(self, monkeypatch):
+        import audit
+        monkeypatch.setattr(audit, "np", None)
+        strings = ["abababab", "aB1cD2eF3gH4iJ5kL6mN7oP8qR9sT0"]
+        assert calculate_entropies(strings) == [calculate_entropy(s) for s in strings]
 
 
 class TestTyposquatDetection:
@@ -90,6 +145,73 @@ class TestTyposquatDetection:
         min_dist, matches = find_typosquat_matches("xyzabc123")
         assert min_dist == 999
         assert len(matches) == 0
+    
+    def test_index_matches_linear_scan(self):
+        import random
+        
+        rng = random.Random(7)
+        names = POPULAR_PACKAGES + ["@babel/core", "@types/node", "is", "a"]
+        index = TyposquatIndex(names)
+        queries = ["", "x", "A", "Express", "pgg", "@babel/cores"]
+        for name in names:
+            for _ in range(5):
+                chars = list(name)
+                for _ in range(rng.randint(1, 3)):
+                    position = rng.randint(0, len(chars))
+                    if rng.random() < 0.4:
+                        chars.insert(position, rng.choice("ax-."))
+                    elif chars:
+                        chars[min(position, len(chars) - 1):min(position, len(chars) - 1) + rng.randint(0, 1)] = ""
+                queries.append("".join(chars))
+        
+        for query in queries:
+            expected = [
+                (rank, levenshtein_distance(query.lower(), popular.lower()))
+                for rank, popular in enumerate(names)
+                if popular != query and levenshtein_distance(query.lower(), popular.lower()) <= 2
+            ]
+            assert index.lookup(query) == expected, query
+    
+    def test_confusable_variants(self):
+        def variants(name):
+            return [(m["popular_package"], m["variant"]) for m in find_confusable_matches(name)]
+        
+        assert variants("lo-dash") == [("lodash", "separator")]
+        assert variants("lodash_") == [("lodash", "separator")]
+        assert variants("lodash.js") == [("lodash", "suffix")]
+        assert variants("express-node") == [("express", "suffix")]
+        assert variants("@types-node") == [("@types/node", "scope")]
+        assert variants("\u0435xpress") == [("express", "homoglyph")]
+        assert variants("l0dash") == [("lodash", "homoglyph")]
+        assert variants("mornent") == [("moment", "homoglyph")]
+        assert variants("@types/nodejs") == [("@types/node", "suffix")]
+        assert variants("lodash") == []
+        assert variants("left-pad") == []
+        assert variants("rx") == variants("day") == variants("chart") == variants("types") == []
+    
+    def test_batch_matches_single_calls(self):
+        names = ["expres", "lo-dash", "react", "xyzabc123", "expres", "reakt", "@types-node", "left-pad"] + [
+            f"{popular}x" for popular in POPULAR_PACKAGES
+        ]
+        results = find_typosquat_matches_many(names)
+        
+        assert list(results) == list(dict.fromkeys(names))
+        for name, result in results.items():
+            assert (result["min_distance"], result["matches"]) == find_typosquat_matches(name)
+            assert result["confusables"] == find_confusable_matches(name)
+            assert result["is_popular"] == is_popular_package(name) == (name in POPULAR_PACKAGES)
+        assert results["react"]["is_popular"] and results["reakt"]["score"] == 90
+        assert results["xyzabc123"]["score"] == 0
+    
+    def test_canonical_forms_are_unique_in_corpus(self):
+        forms = [canonical_name(name) for name in POPULAR_PACKAGES]
+        assert len(set(forms)) == len(forms)
+    
+    def test_corpus_loaded_from_data_file(self, tmp_path):
+        path = tmp_path / "names.txt"
+        path.write_text("# top names\nreact\n\n  lodash  \n")
+        assert load_popular_packages(str(path)) == ["react", "lodash"]
+        assert load_popular_packages() == POPULAR_PACKAGES
 
 
 class TestFreeEmail:
@@ -190,6 +312,10 @@ class TestTyposquatScore:
     def test_no_match(self):
         score = calculate_typosquat_score(999, False)
         assert score == 0
+    
+    def test_confusable_scores_like_distance_1(self):
+        assert calculate_typosquat_score(999, False, True) == 90
+        assert calculate_typosquat_score(2, True, True) == 60
 
 
 class TestTarballScore:
@@ -212,6 +338,12 @@ class TestTarballScore:
     def test_multiple_flags_capped(self):
         score = calculate_tarball_score(True, True, True, True)
         assert score == 100
+    
+    def test_rejected_tarball(self):
+        assert calculate_tarball_score(False, False, False, False, ["integrity_mismatch"]) == 100
+        assert calculate_tarball_score(False, False, False, False, ["too_large", "deadline"]) == 50
+        assert calculate_tarball_score(True, False, False, False, ["too_large"]) == 100
+        assert calculate_tarball_score(False, False, False, False, ["download_error"]) == 0
 
 
 class TestFinalScore:
